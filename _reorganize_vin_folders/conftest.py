@@ -0,0 +1,13 @@
+"""pytest configuration for test_reorganize.py."""
+import os
+import sys
+
+# Make reorganize_sin importable however pytest is invoked (repo root,
+# this directory, xdist workers)
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: builds and executes a full tree on disk")
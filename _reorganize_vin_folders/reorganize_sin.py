@@ -7,7 +7,11 @@ Original files are NEVER modified or deleted.
 Features:
   - Dry-run by default, --execute to apply
   - Reads PDF contents to discover VINs (PyMuPDF, all pages, threaded)
-  - Collision-safe: identical files skipped, different files renamed with _1, _2
+  - Collision-safe: identical files skipped (size+mtime, or hash with --verify),
+    different files renamed with _1, _2
+  - A source copied into several VIN folders is reflinked (btrfs/XFS) after
+    its first copy, else copied again; --hardlink-duplicates hardlinks those
+    instead (shared inode: editing one VIN folder's copy edits all of them)
   - Generates centralized inventory Excel (one row per VIN, document categories)
   - Streaming .jsonl log for crash-safety
 
@@ -15,6 +19,8 @@ Usage:
   python reorganize_sin.py                          # dry run
   python reorganize_sin.py --execute                # copy to SIN_Changed
   python reorganize_sin.py --execute --no-pdf       # skip PDF scanning
+  python reorganize_sin.py --execute --verify       # hash outputs before skipping
+  python reorganize_sin.py --execute --hardlink-duplicates  # link repeat copies
   python reorganize_sin.py --workers 4              # parallel PDF scanning
   python reorganize_sin.py --range-start 5 --range-end 8
   python reorganize_sin.py --rename-files           # standardize PDF filenames
@@ -22,6 +28,7 @@ Usage:
   python reorganize_sin.py --output "D:\SIN_Changed"  # custom output root
 """
 
+import atexit
 import gc
 import os
 import re
@@ -34,8 +41,9 @@ import datetime
 import threading
 import subprocess
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, Counter
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Optional
 
 IS_WINDOWS = sys.platform == "win32"
@@ -43,6 +51,8 @@ IS_WINDOWS = sys.platform == "win32"
 _RETRY_ATTEMPTS = 5
 _RETRY_BASE_DELAY = 0.1  # seconds, doubles each attempt
 MAX_CROSS_COPY_VINS = 100  # PDFs with more VINs than this skip normal cross-copy
+_VERIFY_COPIES = False     # set by main() from --verify: always hash before skipping
+_HARDLINK_DUPLICATES = False  # set by main() from --hardlink-duplicates
 
 # ── Windows path helpers ─────────────────────────────────────────────────────
 
@@ -58,6 +68,129 @@ def _exists(p) -> bool:
     return os.path.exists(_long(p))
 
 
+# ── File copy primitive ──────────────────────────────────────────────────────
+
+_COPY_BUFSIZE = 1024 * 1024  # 1 MiB — scanned PDFs are typically 1-20 MB
+
+_CopyFileExW = None
+if IS_WINDOWS:
+    try:
+        import ctypes
+        from ctypes import wintypes
+        _CopyFileExW = ctypes.WinDLL("kernel32", use_last_error=True).CopyFileExW
+        _CopyFileExW.argtypes = [wintypes.LPCWSTR, wintypes.LPCWSTR, ctypes.c_void_p,
+                                 ctypes.c_void_p, ctypes.c_void_p, wintypes.DWORD]
+        _CopyFileExW.restype = wintypes.BOOL
+    except (ImportError, OSError, AttributeError):
+        _CopyFileExW = None
+
+
+def _copy_contents(fsrc, fdst):
+    """Copy bytes between two open raw files. Prefers copy_file_range
+    (in-kernel; reflink / server-side copy where the FS supports it), else a
+    1 MiB readinto loop. sendfile is not used: it goes through a pipe-sized
+    window and gains nothing over the loop for regular files."""
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        infd, outfd = fsrc.fileno(), fdst.fileno()
+        copied = 0
+        try:
+            while True:
+                n = copy_file_range(infd, outfd, _COPY_BUFSIZE * 8)
+                if n == 0:
+                    return
+                copied += n
+        except OSError:
+            if copied:
+                raise
+            # Unsupported here (EXDEV, ENOSYS, non-regular file) — loop below
+    buf = bytearray(_COPY_BUFSIZE)
+    view = memoryview(buf)
+    while True:
+        n = fsrc.readinto(buf)
+        if not n:
+            return
+        fdst.write(view[:n])
+
+
+_FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+_O_EXCL_CREATE = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+
+def _clone_or_link(existing: str, dst: str) -> str:
+    """Materialize dst as a duplicate of existing (an earlier output copied
+    from the same source) without moving the bytes again: a reflink where the
+    filesystem supports it (btrfs, XFS), else a hardlink when
+    _HARDLINK_DUPLICATES is set. Returns the method used, or "" when neither
+    applies and a real copy is needed.
+
+    Like _copy_file, dst is created exclusively: FileExistsError is raised
+    when the name is already taken, and only a file this call created is
+    ever removed.  A hardlink shares its inode with `existing`, so editing
+    one VIN folder's copy in place changes every linked copy; that is why
+    it is opt-in."""
+    if not IS_WINDOWS:
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+        if fcntl is not None:
+            fd = os.open(dst, _O_EXCL_CREATE, 0o666)  # FileExistsError propagates
+            try:
+                with open(existing, 'rb') as fsrc:
+                    fcntl.ioctl(fd, _FICLONE, fsrc.fileno())
+                os.close(fd)
+                fd = -1
+                shutil.copystat(existing, dst)
+                return "reflink"
+            except OSError:
+                # No reflink here (ext4, tmpfs, cross-device): drop the empty
+                # file we created so the name is free for the link or copy
+                if fd >= 0:
+                    os.close(fd)
+                try:
+                    os.unlink(dst)
+                except OSError:
+                    pass
+    if not _HARDLINK_DUPLICATES:
+        return ""
+    try:
+        os.link(existing, dst)
+        return "hardlink"
+    except FileExistsError:
+        raise
+    except OSError:
+        return ""
+
+
+_COPY_FILE_FAIL_IF_EXISTS = 0x1
+
+
+def _copy_file(src: str, dst: str):
+    """Copy src to a new file dst on the hot copy path. Raises
+    FileExistsError instead of overwriting when dst appeared since the
+    destination was chosen. Contents via CopyFileExW on Windows (which also
+    keeps timestamps/attributes), _copy_contents elsewhere, then the source
+    timestamps with one utime. A partial dst is removed on failure."""
+    if _CopyFileExW is not None:
+        if not _CopyFileExW(src, dst, None, None, None, _COPY_FILE_FAIL_IF_EXISTS):
+            raise ctypes.WinError(ctypes.get_last_error())
+        return
+    with open(src, 'rb', buffering=0) as fsrc:
+        st = os.fstat(fsrc.fileno())
+        fdst = open(os.open(dst, _O_EXCL_CREATE, 0o666), 'wb', buffering=0)
+        try:
+            with fdst:
+                _copy_contents(fsrc, fdst)
+            os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+        except BaseException:
+            try:
+                os.unlink(dst)
+            except OSError:
+                pass
+            raise
+
+
 try:
     from tqdm import tqdm
     HAS_TQDM = True
@@ -75,6 +208,24 @@ except ImportError:
         @staticmethod
         def write(s): print(s)
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
 try:
     import fitz
     HAS_PYMUPDF = True
@@ -88,6 +239,18 @@ try:
 except ImportError:
     HAS_OPENPYXL = False
 
+try:
+    import hyperscan
+    HAS_HYPERSCAN = True
+except ImportError:
+    HAS_HYPERSCAN = False
+
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
 try:
     import pytesseract
     from PIL import Image
@@ -101,7 +264,10 @@ except ImportError:
 SIN_ROOT = Path(r"C:\SIN")
 OUTPUT_ROOT = Path(r"C:\SIN_Changed")
 
-VIN_PATTERN = re.compile(r'(?<![A-Z0-9])([A-Z0-9]{17})(?![A-Z0-9])')
+# VIN character class: VIN_PATTERN and the hyperscan scan (expression and
+# boundary bytes) are all built from it, so the two paths cannot drift apart
+_VIN_CHARS = "A-Z0-9"
+VIN_PATTERN = re.compile(rf'(?<![{_VIN_CHARS}])([{_VIN_CHARS}]{{17}})(?![{_VIN_CHARS}])')
 FL_PATTERN = re.compile(
     r'^FL\s*-\s*.+?\s*-\s*([A-Z0-9]{17}).*\.pdf$', re.IGNORECASE
 )
@@ -117,20 +283,61 @@ def merge_partition_name(name: str) -> str:
 
 # ── VIN helpers ──────────────────────────────────────────────────────────────
 
+# Both are pure and see the same folder names and candidates over and over
+# (scan, inventory, reclassify, rescue), so results are memoised.
+_VIN_NAME = re.compile(r'[A-Z0-9]{17}')
+
+
+@lru_cache(maxsize=4096)
 def is_valid_vin(s: str) -> bool:
     if len(s) != 17: return False
     return any(c.isalpha() for c in s) and any(c.isdigit() for c in s)
 
 
+@lru_cache(maxsize=4096)
 def is_vin(name: str) -> bool:
     name = name.strip()
-    return bool(re.match(r'^[A-Z0-9]{17}$', name)) and is_valid_vin(name)
+    return _VIN_NAME.fullmatch(name) is not None and is_valid_vin(name)
 
 
 def extract_all_vins(fn: str) -> list:
     return [v for v in VIN_PATTERN.findall(fn) if is_valid_vin(v)]
 
 
+# Hyperscan cannot express VIN_PATTERN's lookarounds, so its DFA reports every
+# 17-char VIN-class window (leftmost start) and the boundaries are checked here.
+# Databases carry per-scan scratch space, hence one per thread.
+_vin_hs = threading.local()
+_VIN_CLASS_BYTES = frozenset(b for b in range(256)
+                             if re.fullmatch(f'[{_VIN_CHARS}]', chr(b)))
+
+
+def _vin_hs_db():
+    db = getattr(_vin_hs, "db", None)
+    if db is None:
+        db = hyperscan.Database()
+        db.compile(expressions=[f'[{_VIN_CHARS}]{{17}}'.encode('ascii')], ids=[1],
+                   flags=[hyperscan.HS_FLAG_SOM_LEFTMOST])
+        _vin_hs.db = db
+    return db
+
+
+def find_vin_candidates(text: str) -> list:
+    """VIN_PATTERN.findall(text), via a hyperscan DFA when available — about
+    an order of magnitude faster on multi-MB page text."""
+    if not HAS_HYPERSCAN:
+        return VIN_PATTERN.findall(text)
+    # latin-1 keeps byte offsets == char offsets; anything else is a boundary
+    data = text.encode('latin-1', 'replace')
+    spans = []
+    _vin_hs_db().scan(data, match_event_handler=
+                      lambda _id, start, end, _flags, _ctx: spans.append((start, end)))
+    n = len(data)
+    return [data[s:e].decode('ascii') for s, e in spans
+            if (s == 0 or data[s - 1] not in _VIN_CLASS_BYTES)
+            and (e == n or data[e] not in _VIN_CLASS_BYTES)]
+
+
 def extract_vin_from_filename(fn: str) -> Optional[str]:
     m = FL_PATTERN.match(fn)
     if m: return m.group(1)
@@ -146,12 +353,22 @@ def extract_vin_from_filename(fn: str) -> Optional[str]:
 _pdf_cache: dict = {}          # path_str -> set of VINs
 _pdf_content_cats: dict = {}   # path_str -> set of critical category names
 _pdf_stats = {"scanned": 0, "failed": 0, "vins_found": 0}
+_pdf_stats_lock = threading.Lock()  # += is read-modify-write; dict stores are atomic
+# PyMuPDF is not thread-safe: threaded callers (scan_and_plan workers missing
+# the prescan cache) open PDFs one at a time.  Process pools don't need it.
+_fitz_lock = threading.Lock()
 
 # ── Persistent OCR cache (survives across runs) ─────────────────────────────
 # Keyed by path_str → {size, mtime, vins, cats, ocr_used}
 # If file size/mtime changed since last scan, entry is stale → rescan.
+# save_ocr_cache() only appends entries changed since the last save to a
+# sidecar log; compact_ocr_cache() folds that log into the main file.
 _ocr_disk_cache: dict = {}
+_ocr_dirty: set = set()
+_ocr_loaded_root: Optional[Path] = None
+_ocr_load_failed = False  # main file unreadable: never compact over it
 _OCR_CACHE_FILE = "ocr_cache.json"
+_OCR_WAL_FILE = "ocr_cache.wal"
 
 
 def _file_fingerprint(path_str: str) -> tuple:
@@ -163,33 +380,138 @@ def _file_fingerprint(path_str: str) -> tuple:
         return (0, 0)
 
 
+def _read_blob(path: Path):
+    """Decode a map persisted by _write_blob. The file is memory-mapped and
+    the format sniffed: JSON (starts with '{'), or msgpack written by earlier
+    versions, which needs msgpack installed to read."""
+    import mmap
+    with open(str(path), 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:1] == b'{':
+                return orjson.loads(mm[:]) if HAS_ORJSON else json.loads(mm[:])
+            if not HAS_MSGPACK:
+                raise RuntimeError(f"{path.name} is msgpack-encoded; pip install msgpack")
+            return msgpack.unpackb(mm, raw=False)
+
+
+def _write_blob(path: Path, obj):
+    """Persist a map as JSON, replacing the file atomically so an interrupted
+    save never leaves a truncated cache.  These files are shared on the output
+    tree, so the format must not depend on an optional package: orjson only
+    speeds up encoding the same JSON."""
+    if HAS_ORJSON:
+        data = orjson.dumps(obj)
+    else:
+        data = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+    tmp = path.with_name(path.name + ".tmp")
+    with open(str(tmp), 'wb') as f:
+        f.write(data)
+    os.replace(str(tmp), str(path))
+
+
+def _replay_ocr_wal(wal_path: Path) -> int:
+    """Apply [path, entry] JSON lines from the sidecar log on top of the
+    loaded cache. Torn lines from an interrupted save are skipped."""
+    applied = 0
+    loads = orjson.loads if HAS_ORJSON else json.loads
+    with open(str(wal_path), 'rb') as f:
+        for line in f:
+            try:
+                key, entry = loads(line)
+            except ValueError:
+                continue
+            _ocr_disk_cache[key] = entry
+            applied += 1
+    return applied
+
+
 def load_ocr_cache(output_root: Path):
-    """Load persistent OCR cache from disk."""
-    global _ocr_disk_cache
+    """Load persistent OCR cache from disk, replaying any unsaved log."""
+    global _ocr_disk_cache, _ocr_loaded_root, _ocr_load_failed
     cache_path = output_root / _OCR_CACHE_FILE
+    wal_path = output_root / _OCR_WAL_FILE
+    _ocr_dirty.clear()
+    _ocr_loaded_root = output_root
+    _ocr_load_failed = False
     if cache_path.exists():
         try:
-            with open(str(cache_path), 'r', encoding='utf-8') as f:
-                _ocr_disk_cache = json.load(f)
+            _ocr_disk_cache = _read_blob(cache_path)
             print(f"  OCR cache: loaded {len(_ocr_disk_cache)} entries from {cache_path.name}",
                   file=sys.stderr)
         except Exception as exc:
             print(f"  WARNING: Could not load OCR cache: {exc}", file=sys.stderr)
             _ocr_disk_cache = {}
+            _ocr_load_failed = True
     else:
         _ocr_disk_cache = {}
+    if wal_path.exists():
+        try:
+            n = _replay_ocr_wal(wal_path)
+            print(f"  OCR cache: replayed {n} entries from {wal_path.name}",
+                  file=sys.stderr)
+        except Exception as exc:
+            print(f"  WARNING: Could not replay OCR cache log: {exc}", file=sys.stderr)
 
 
 def save_ocr_cache(output_root: Path):
-    """Save persistent OCR cache to disk."""
+    """Append entries changed since the last save to the cache log.
+    Cost is proportional to the new results, not to the whole cache."""
+    if not _ocr_dirty:
+        return
+    wal_path = output_root / _OCR_WAL_FILE
+    try:
+        if HAS_ORJSON:
+            lines = [orjson.dumps([k, _ocr_disk_cache[k]]) + b"\n"
+                     for k in sorted(_ocr_dirty) if k in _ocr_disk_cache]
+        else:
+            lines = [(json.dumps([k, _ocr_disk_cache[k]], ensure_ascii=False)
+                      + "\n").encode('utf-8')
+                     for k in sorted(_ocr_dirty) if k in _ocr_disk_cache]
+        n = len(lines)
+        try:  # start on a fresh line after a torn write
+            with open(str(wal_path), 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    lines.insert(0, b"\n")
+        except OSError:
+            pass  # no log yet
+        with open(str(wal_path), 'ab') as f:
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        _ocr_dirty.clear()
+        print(f"  OCR cache: logged {n} new entries to {wal_path.name}",
+              file=sys.stderr)
+    except Exception as exc:
+        print(f"  WARNING: Could not save OCR cache: {exc}", file=sys.stderr)
+
+
+def compact_ocr_cache(output_root: Path):
+    """Rewrite the main cache file with everything logged so far and drop
+    the log. Registered with atexit by main(); a no-op unless this process
+    loaded the cache for output_root and something was logged."""
+    if _ocr_loaded_root != output_root:
+        return
+    save_ocr_cache(output_root)
+    wal_path = output_root / _OCR_WAL_FILE
+    if not wal_path.exists():
+        return
     cache_path = output_root / _OCR_CACHE_FILE
+    if _ocr_load_failed:
+        # Only this run's entries are in memory: rewriting would replace the
+        # unreadable cache with them and dropping the log would lose them too
+        print(f"  WARNING: {cache_path.name} could not be read; keeping it and "
+              f"{wal_path.name} as they are", file=sys.stderr)
+        return
     try:
-        with open(str(cache_path), 'w', encoding='utf-8') as f:
-            json.dump(_ocr_disk_cache, f, ensure_ascii=False)
+        _write_blob(cache_path, _ocr_disk_cache)
+        os.remove(str(wal_path))
         print(f"  OCR cache: saved {len(_ocr_disk_cache)} entries to {cache_path.name}",
               file=sys.stderr)
     except Exception as exc:
-        print(f"  WARNING: Could not save OCR cache: {exc}", file=sys.stderr)
+        print(f"  WARNING: Could not compact OCR cache: {exc}", file=sys.stderr)
 
 
 # ── Persistent rename map (original filenames survive across runs) ───────────
@@ -202,9 +524,8 @@ def load_rename_map(output_root: Path) -> dict:
     if not map_path.exists():
         return {}
     try:
-        with open(str(map_path), 'r', encoding='utf-8') as f:
-            raw = json.load(f)
-        # JSON keys are strings; convert "vin||new_fn" back to (vin, new_fn) tuples
+        raw = _read_blob(map_path)
+        # Keys are strings; convert "vin||new_fn" back to (vin, new_fn) tuples
         result = {}
         for key, orig in raw.items():
             parts = key.split("||", 1)
@@ -225,17 +546,18 @@ def save_rename_map(output_root: Path, original_names: dict):
     existing = {}
     if map_path.exists():
         try:
-            with open(str(map_path), 'r', encoding='utf-8') as f:
-                existing = json.load(f)
-        except Exception:
-            pass
+            existing = _read_blob(map_path)
+        except Exception as exc:
+            # Writing now would replace every earlier mapping with this run's
+            print(f"  WARNING: Could not read {map_path.name} ({exc}); "
+                  f"not saving over it", file=sys.stderr)
+            return
     # Merge new entries (new wins on conflict)
     for (vin, new_fn), orig_fn in original_names.items():
         key = f"{vin}||{new_fn}"
         existing[key] = orig_fn
     try:
-        with open(str(map_path), 'w', encoding='utf-8') as f:
-            json.dump(existing, f, ensure_ascii=False)
+        _write_blob(map_path, existing)
         print(f"  Rename map: saved {len(existing)} entries to {map_path.name}",
               file=sys.stderr)
     except Exception as exc:
@@ -270,6 +592,7 @@ def _ocr_cache_store(path_str: str, vins: set = None, cats: set = None,
     if reclass_cat != "__UNSET__":
         entry["reclass_cat"] = reclass_cat  # None or category string
     _ocr_disk_cache[path_str] = entry
+    _ocr_dirty.add(path_str)
 
 # Keywords to detect critical categories from PDF text content (uppercase)
 _CONTENT_CAT_KEYWORDS = {
@@ -336,13 +659,33 @@ def _ocr_restore():
         _OCR_MAX_PAGES = _ocr_saved_settings["max_pages"]
         _OCR_TESS_CONFIG = _ocr_saved_settings["config"]
 
+def _limit_native_threads():
+    """One OpenMP/BLAS thread per tesseract: the worker pools already use
+    every core, and tesseract's default of one thread per core would
+    oversubscribe the machine workers-fold."""
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
+
 def _ocr_pool_init(dpi, max_pages, tess_config):
     """Initializer for ProcessPoolExecutor workers — propagates OCR settings."""
     global _OCR_DPI, _OCR_MAX_PAGES, _OCR_TESS_CONFIG
+    _limit_native_threads()
     _OCR_DPI = dpi
     _OCR_MAX_PAGES = max_pages
     _OCR_TESS_CONFIG = tess_config
 
+def _ocr_png(png: bytes, tess_config: str) -> str:
+    """OCR an already-rendered PNG page. Top-level so it pickles into a pool."""
+    if not HAS_OCR:
+        return ""
+    try:
+        img = Image.open(io.BytesIO(png))
+        return pytesseract.image_to_string(img, lang='ron+eng', config=tess_config)
+    except Exception:
+        return ""
+
+
 def _ocr_page(page) -> str:
     """Render a PyMuPDF page to grayscale image and OCR it with pytesseract."""
     if not HAS_OCR or not HAS_PYMUPDF:
@@ -350,14 +693,39 @@ def _ocr_page(page) -> str:
     try:
         mat = fitz.Matrix(_OCR_DPI / 72, _OCR_DPI / 72)
         pix = page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY)
-        img = Image.open(io.BytesIO(pix.tobytes("png")))
-        text = pytesseract.image_to_string(img, lang='ron+eng',
-                                           config=_OCR_TESS_CONFIG)
-        return text
+        return _ocr_png(pix.tobytes("png"), _OCR_TESS_CONFIG)
     except Exception:
         return ""
 
 
+def _rasterize_pdf(path_str: str, max_pages: int, dpi: int) -> tuple:
+    """Producer half of the rescue OCR pipeline: read every page's text layer
+    and render the sparse-text pages among the first max_pages to PNG.
+    Returns (page_texts, [(page_idx, png_bytes), ...])."""
+    doc = fitz.open(_long(path_str))
+    try:
+        mat = fitz.Matrix(dpi / 72, dpi / 72)
+        texts, images = [], []
+        for i, page in enumerate(doc):
+            text = page.get_text()
+            texts.append(text)
+            if i < max_pages and sum(1 for c in text if c.isalnum()) < _OCR_MIN_TEXT:
+                pix = page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY)
+                images.append((i, pix.tobytes("png")))
+        return texts, images
+    finally:
+        doc.close()
+
+
+def _classify_page_texts(page_texts: list) -> tuple:
+    """(vins, cats) for a PDF's page texts: VINs from every page, categories
+    from page 1 only (later pages have unrelated references)."""
+    full_text = chr(12).join(page_texts).upper()
+    page1_text = page_texts[0].upper() if page_texts else ""
+    vins = {v for v in find_vin_candidates(full_text) if is_valid_vin(v)}
+    return vins, _detect_content_categories(page1_text)
+
+
 def _needs_ocr(path_str: str) -> bool:
     """Fast pre-filter: open PDF with PyMuPDF, check if first 2 pages
     have sparse text (<50 alnum chars). If all pages have enough text,
@@ -405,39 +773,73 @@ def _scan_single_pdf(path_str: str, ocr: bool = False) -> tuple:
             return (path_str, cached_vins, cached_cats, None)
     try:
         doc = fitz.open(_long(path_str))
-        # VINs: scan all pages (VINs can appear anywhere)
-        full_text = chr(12).join(
-            _extract_page_text(page, i, ocr=ocr) for i, page in enumerate(doc)
-        ).upper()
-        # Categories: first page only (later pages have unrelated references)
-        page1_text = _extract_page_text(doc[0], 0, ocr=ocr).upper() if len(doc) > 0 else ""
+        # Page 1 is extracted once and reused for categories (no second OCR)
+        page_texts = [_extract_page_text(page, i, ocr=ocr) for i, page in enumerate(doc)]
         doc.close()
-        vins = {v for v in VIN_PATTERN.findall(full_text) if is_valid_vin(v)}
-        cats = _detect_content_categories(page1_text)
+        vins, cats = _classify_page_texts(page_texts)
         return (path_str, vins, cats, None)
     except Exception as e:
         return (path_str, set(), set(), e)
 
 
+def _record_pdf_scan(key: str, vins: set, cats: set, err) -> None:
+    """Cache one scan result.  Categories are stored before VINs because
+    a _pdf_cache hit is what tells other threads the entry is complete."""
+    _pdf_content_cats[key] = cats
+    _pdf_cache[key] = vins
+    with _pdf_stats_lock:
+        if err: _pdf_stats["failed"] += 1
+        else: _pdf_stats["scanned"] += 1; _pdf_stats["vins_found"] += len(vins)
+
+
 def extract_vins_from_pdf(path: Path) -> set:
     key = str(path)
     if key in _pdf_cache: return _pdf_cache[key]
     if not HAS_PYMUPDF:
-        _pdf_cache[key] = set()
         _pdf_content_cats[key] = set()
+        _pdf_cache[key] = set()
         return set()
-    _, vins, cats, err = _scan_single_pdf(key, ocr=False)  # OCR is post-copy only
-    if err: _pdf_stats["failed"] += 1
-    else: _pdf_stats["scanned"] += 1; _pdf_stats["vins_found"] += len(vins)
-    _pdf_cache[key] = vins
-    _pdf_content_cats[key] = cats
+    with _fitz_lock:
+        _, vins, cats, err = _scan_single_pdf(key, ocr=False)  # OCR is post-copy only
+    _record_pdf_scan(key, vins, cats, err)
     return vins
 
 
+def _list_dir(folder: Path) -> list:
+    """Sorted (path, is_dir, is_file) for each entry of `folder`.
+
+    DirEntry carries the file type from readdir, so classifying an entry
+    costs no extra stat (Path.iterdir + is_dir stats every child)."""
+    with os.scandir(folder) as it:
+        entries = [(Path(e.path), e.is_dir(), e.is_file()) for e in it]
+    entries.sort(key=lambda t: t[0])
+    return entries
+
+
+def _walk_files(top: Path) -> list:
+    """Every regular file under `top`, in the order sorted(top.rglob('*'))
+    would give.  Like rglob, symlinked directories are not descended into and
+    unreadable subdirectories are skipped; an unreadable `top` raises."""
+    files, stack = [], [str(top)]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except PermissionError:
+            if d == str(top): raise
+            continue
+        with it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False): stack.append(e.path)
+                elif e.is_file(): files.append(Path(e.path))
+    files.sort()
+    return files
+
+
 def _get_partition_dirs(root: Path, range_start: int = 0, range_end: int = 0) -> list:
     all_parts = []
-    for d in sorted(root.iterdir()):
-        if not d.is_dir(): continue
+    for d, is_dir, _ in _list_dir(root):
+        if not is_dir: continue
         if not (d.name.upper().startswith("SINDICALIZARE") or
                 d.name.upper().startswith("SINICALIZARE")):
             continue
@@ -456,8 +858,8 @@ def bulk_prescan_pdfs(root: Path, workers: int, range_start: int = 0,
     seen = set()
     for part_dir in _get_partition_dirs(root, range_start, range_end):
         try:
-            for p in part_dir.rglob("*"):
-                if p.is_file() and p.suffix.lower() == ".pdf":
+            for p in _walk_files(part_dir):
+                if p.suffix.lower() == ".pdf":
                     key = str(p)
                     if key not in seen:
                         seen.add(key)
@@ -471,31 +873,37 @@ def bulk_prescan_pdfs(root: Path, workers: int, range_start: int = 0,
                bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]")
 
     def _cb(path_str, vins, cats, err):
-        _pdf_cache[path_str] = vins
-        _pdf_content_cats[path_str] = cats
-        if err: _pdf_stats["failed"] += 1
-        else: _pdf_stats["scanned"] += 1; _pdf_stats["vins_found"] += len(vins)
+        _record_pdf_scan(path_str, vins, cats, err)
         bar.update(1)
 
-    PDF_TIMEOUT = 120
-
     if workers <= 1:
         for p in pdf_paths: _cb(*_scan_single_pdf(p, ocr=False))
     else:
         try:
             Executor = concurrent.futures.ProcessPoolExecutor
+            # Bounded submission window: results stream in completion order
+            # and a slow PDF only holds its own slot, while the pending set
+            # stays a few futures per worker instead of one per PDF.
+            window = workers * 4
+            todo = iter(pdf_paths)
             with Executor(max_workers=workers) as exe:
-                futs = {exe.submit(_scan_single_pdf, p, False): p for p in pdf_paths}
-                for f in concurrent.futures.as_completed(futs):
-                    p = futs[f]
-                    try:
-                        _cb(*f.result(timeout=PDF_TIMEOUT))
-                    except concurrent.futures.TimeoutError:
-                        _cb(p, set(), set(), TimeoutError(f"PDF hung >{PDF_TIMEOUT}s"))
-                        tqdm.write(f"  WARNING: PDF scan timed out: {p}")
-                    except Exception as exc:
-                        _cb(p, set(), set(), exc)
-                        tqdm.write(f"  WARNING: PDF scan crashed: {p}: {exc}")
+                futs = {}
+                for p in todo:
+                    futs[exe.submit(_scan_single_pdf, p, False)] = p
+                    if len(futs) >= window: break
+                while futs:
+                    done, _ = concurrent.futures.wait(
+                        futs, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for f in done:
+                        p = futs.pop(f)
+                        try:
+                            _cb(*f.result())
+                        except Exception as exc:
+                            _cb(p, set(), set(), exc)
+                            tqdm.write(f"  WARNING: PDF scan crashed: {p}: {exc}")
+                        nxt = next(todo, None)
+                        if nxt is not None:
+                            futs[exe.submit(_scan_single_pdf, nxt, False)] = nxt
         except Exception as exc:
             tqdm.write(f"  WARNING: Process pool broken ({exc}), "
                        f"falling back to sequential scanning...")
@@ -514,31 +922,77 @@ def bulk_prescan_pdfs(root: Path, workers: int, range_start: int = 0,
 
 # ── Collision-safe file helpers ──────────────────────────────────────────────
 
-def _file_hash(path: Path) -> str:
-    h = hashlib.md5()
-    with open(_long(path), 'rb') as f:
-        for chunk in iter(lambda: f.read(65536), b''): h.update(chunk)
-    return h.hexdigest()
+def _new_hash():
+    # Digests only ever meet other digests from the same run, so the
+    # algorithm may differ between machines
+    return xxhash.xxh3_128() if HAS_XXHASH else hashlib.blake2b()
+
+
+def _file_hash(path) -> str:
+    """Content digest for deduplication: xxh3-128 when xxhash is installed
+    (non-cryptographic, several times faster), else blake2b.
+    hashlib.file_digest (3.11+) streams through one reusable buffer.
+    Unreadable files get a per-path sentinel so they never match."""
+    try:
+        with open(_long(path), 'rb') as f:
+            if hasattr(hashlib, "file_digest"):
+                return hashlib.file_digest(f, _new_hash).hexdigest()
+            h, buf = _new_hash(), bytearray(1 << 20)
+            view = memoryview(buf)
+            while n := f.readinto(buf): h.update(view[:n])
+            return h.hexdigest()
+    except OSError:
+        return f"__error_{path}"
 
 
-def _files_identical(a: Path, b: Path) -> bool:
+def _files_identical(a: Path, b: Path, quick: bool = False) -> bool:
+    """Content equality.  With quick=True equal size and mtime_ns count as
+    equal without reading either file (rsync's quick check): every output
+    this script writes carries its source's mtime, so a previous run's copy
+    matches that way."""
     try:
-        if a.stat().st_size != b.stat().st_size: return False
+        sa, sb = os.stat(_long(a)), os.stat(_long(b))
+        if sa.st_size != sb.st_size: return False
+        if quick and sa.st_mtime_ns == sb.st_mtime_ns: return True
         return _file_hash(a) == _file_hash(b)
     except OSError:
         return False
 
 
-def _safe_dest(src: Path, dst: Path) -> tuple:
+_COLLISION_SUFFIX = re.compile(r'^(.+?)_(\d+)$')
+
+
+def _collision_stem(stem: str) -> str:
+    """'doc_3' -> 'doc': the stem _safe_dest numbers collision candidates from."""
+    m = _COLLISION_SUFFIX.match(stem)
+    return m.group(1) if m else stem
+
+
+def _name_slot(dst: str) -> tuple:
+    """Every name _safe_dest may hand out for dst (dst itself and its _N
+    variants) maps to the same slot; normcase folds case where the file
+    system does."""
+    parent, name = os.path.split(dst)
+    stem, suffix = os.path.splitext(name)
+    return os.path.normcase(parent), os.path.normcase(_collision_stem(stem) + suffix)
+
+
+def _safe_dest(src: Path, dst: Path, fresh: set = None) -> tuple:
+    """Pick where src goes: dst, an existing identical copy ("skip"), or the
+    first free _N name.  Given `fresh` (outputs written earlier in this run),
+    other existing files may pass the stat quick check; fresh ones may be
+    another source with the same size and mtime, so they are always hashed."""
+    quick = fresh is not None and not _VERIFY_COPIES
+    def _same(p): return _files_identical(src, p, quick and _long(p) not in fresh)
+
     if not _exists(dst): return dst, "ok"
-    if _files_identical(src, dst): return dst, "skip"
-    stem, suffix, parent = dst.stem, dst.suffix, dst.parent
-    m = re.match(r'^(.+?)_(\d+)$', stem)
-    base_stem = m.group(1) if m else stem
+    if _same(dst): return dst, "skip"
+    suffix, parent = dst.suffix, dst.parent
+    base_stem = _collision_stem(dst.stem)
     for i in range(1, 10000):
         candidate = parent / f"{base_stem}_{i}{suffix}"
         if not _exists(candidate): return candidate, "renamed"
-        if _files_identical(src, candidate): return candidate, "skip"
+        if _same(candidate): return candidate, "skip"
     return dst, "ok"
 
 
@@ -553,6 +1007,67 @@ class Change:
     parent_folder: str = ""
     vin: str = ""
     status: str = "planned"
+    method: str = ""  # copy, reflink or hardlink once executed
+
+
+class _JsonlWriter:
+    """Background writer for the execute log. Copy workers only enqueue a
+    record dict; one thread encodes (orjson when available) into a 64 KiB
+    buffer, flushing every 256 records and after a second without new ones
+    so the log stays current."""
+    _FLUSH_EVERY = 256
+    _IDLE_FLUSH = 1.0  # seconds
+
+    def __init__(self, path: Path):
+        import io
+        import queue
+        self._fh = io.BufferedWriter(open(path, 'wb', buffering=0), buffer_size=64 * 1024)
+        self._q = queue.SimpleQueue()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="jsonl-writer", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _encode(record: dict) -> bytes:
+        if HAS_ORJSON:
+            return orjson.dumps(record) + b"\n"
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+
+    def put(self, record: dict):
+        self._q.put(record)
+
+    def _run(self):
+        import queue
+        pending = 0
+        try:
+            while True:
+                try:
+                    item = self._q.get(timeout=self._IDLE_FLUSH)
+                except queue.Empty:
+                    if pending:
+                        self._fh.flush()
+                        pending = 0
+                    continue
+                if item is None:
+                    break
+                self._fh.write(self._encode(item))
+                pending += 1
+                if pending >= self._FLUSH_EVERY:
+                    self._fh.flush()
+                    pending = 0
+        except Exception as e:
+            self._error = e
+
+    def close(self):
+        self._q.put(None)
+        self._thread.join()
+        try:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+        finally:
+            self._fh.close()
+        if self._error:
+            raise self._error
 
 
 class Ledger:
@@ -561,6 +1076,7 @@ class Ledger:
         self.warnings: list = []
         self.pdf_scans: list = []
         self._planned_dests: dict = {}
+        self.status_counts: Counter = Counter()
         self._lock = threading.Lock()
 
     def add(self, action, source, destination, reason="", parent_folder="", vin=""):
@@ -577,6 +1093,16 @@ class Ledger:
                 reason=reason, parent_folder=parent_folder, vin=vin,
             ))
 
+    def merge(self, other: "Ledger"):
+        """Append another ledger's plan (e.g. a per-thread shard), applying
+        the same duplicate-destination rule as add()."""
+        for c in other.changes:
+            self.add(c.action, c.source, c.destination, reason=c.reason,
+                     parent_folder=c.parent_folder, vin=c.vin)
+        with self._lock:
+            self.warnings.extend(other.warnings)
+            self.pdf_scans.extend(other.pdf_scans)
+
     def warn(self, msg):
         with self._lock:
             self.warnings.append(msg)
@@ -593,39 +1119,76 @@ class Ledger:
         bar = tqdm(total=len(self.changes), desc=label, unit="op",
                    bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]")
 
-        jsonl_fh = None
-        jsonl_lock = threading.Lock()
+        writer = None
         if jsonl_path and not dry_run:
             os.makedirs(str(jsonl_path.parent), exist_ok=True)
-            jsonl_fh = open(jsonl_path, 'w', encoding='utf-8')
+            writer = _JsonlWriter(jsonl_path)
+
+        # Every status transition below ends in _log(), so the summary
+        # counts come from here instead of re-walking self.changes.
+        self.status_counts.clear()
+
+        def _log(change):
+            with self._lock:
+                self.status_counts[change.status] += 1
+            if writer is not None:
+                writer.put(self._change_record(change))
 
-        def _log_safe(fh, change):
-            if fh is None: return
-            with jsonl_lock: self._log_change(fh, change)
+        # source -> first destination really copied this run; later copies of
+        # the same source are reflinked (or hardlinked) from it (see _clone_or_link)
+        first_copies = {}
+        first_lock = threading.Lock()
+        written = set()  # outputs created this run (see _safe_dest)
 
         def _exec_copy(c):
             src, dst = Path(c.source), Path(c.destination)
             try:
                 if not _exists(src):
                     c.status = "skipped"
-                    _log_safe(jsonl_fh, c)
+                    _log(c)
                     return
                 os.makedirs(_long(dst.parent), exist_ok=True)
-                actual, status = _safe_dest(src, dst)
+                actual, status = _safe_dest(src, dst, written)
                 if status == "skip":
                     c.status = "skipped"
-                    _log_safe(jsonl_fh, c)
+                    _log(c)
                     return
                 if status == "renamed":
                     c.destination = str(actual)
+                with first_lock:
+                    first = first_copies.get(c.source)
+                    # registered before the bytes land, so no other worker
+                    # can quick-check a half-finished copy of this name
+                    written.add(_long(actual))
                 # Retry with exponential backoff for WinError 32 (file locked)
                 last_err = None
                 for attempt in range(_RETRY_ATTEMPTS):
                     try:
-                        shutil.copy2(_long(src), _long(actual))
-                        c.status = "done"
-                        _log_safe(jsonl_fh, c)
+                        if first is not None:
+                            c.method = _clone_or_link(first, _long(actual))
+                            if c.method:
+                                c.status = "done"
+                                _log(c)
+                                return
+                            first = None  # neither works here: copy the bytes
+                        _copy_file(_long(src), _long(actual))
+                        c.status, c.method = "done", "copy"
+                        with first_lock:
+                            first_copies.setdefault(c.source, _long(actual))
+                        _log(c)
                         return
+                    except FileExistsError as e:
+                        # Another worker took this name after _safe_dest
+                        # picked it: choose again rather than overwrite
+                        last_err = e
+                        actual, status = _safe_dest(src, actual, written)
+                        if status == "skip":
+                            c.status = "skipped"
+                            _log(c)
+                            return
+                        c.destination = str(actual)
+                        with first_lock:
+                            written.add(_long(actual))
                     except OSError as e:
                         last_err = e
                         if getattr(e, 'winerror', 0) == 32 or 'being used' in str(e):
@@ -634,11 +1197,11 @@ class Ledger:
                         else:
                             raise
                 c.status = "failed"
-                _log_safe(jsonl_fh, c)
+                _log(c)
                 tqdm.write(f"  ERROR [{c.action}] {src.name}: {last_err}")
             except Exception as e:
                 c.status = "failed"
-                _log_safe(jsonl_fh, c)
+                _log(c)
                 tqdm.write(f"  ERROR [{c.action}] {src.name}: {e}")
 
         try:
@@ -656,11 +1219,21 @@ class Ledger:
                     if dry_run:
                         for _ in batch: bar.update(1)
                         continue
+                    # Copies that could pick the same name run in plan order
+                    # on one worker: naming is deterministic and workers never
+                    # race for a name (FileExistsError is left for outsiders)
+                    slots = defaultdict(list)
+                    for bc in batch:
+                        slots[_name_slot(bc.destination)].append(bc)
+
+                    def _exec_slot(group):
+                        for bc in group: _exec_copy(bc)
+                        return len(group)
+
                     with ThreadPoolExecutor(max_workers=workers) as pool:
-                        futs = {pool.submit(_exec_copy, bc): bc for bc in batch}
+                        futs = [pool.submit(_exec_slot, g) for g in slots.values()]
                         for f in as_completed(futs):
-                            bar.update(1)
-                            f.result()
+                            bar.update(f.result())
                     continue
 
                 # Sequential: create_folder or single copy_file
@@ -673,34 +1246,27 @@ class Ledger:
                     dst = Path(c.destination)
                     os.makedirs(_long(dst), exist_ok=True)
                     c.status = "done"
-                    self._log_change(jsonl_fh, c)
+                    _log(c)
                 elif c.action == "copy_file":
                     _exec_copy(c)
 
                 bar.update(1)
         finally:
             bar.close()
-            if jsonl_fh: jsonl_fh.close()
+            if writer: writer.close()
 
     @staticmethod
-    def _log_change(fh, c):
-        if fh is None: return
-        fh.write(json.dumps({
+    def _change_record(c) -> dict:
+        return {
             "action": c.action, "source": c.source, "destination": c.destination,
             "reason": c.reason, "parent_folder": c.parent_folder,
-            "vin": c.vin, "status": c.status,
-        }, ensure_ascii=False) + "\n")
-        fh.flush()
+            "vin": c.vin, "status": c.status, "method": c.method,
+        }
 
     def write_json(self, path: Path):
         data = {
             "generated": datetime.datetime.now().isoformat(),
-            "changes": [
-                {"action": c.action, "source": c.source, "destination": c.destination,
-                 "reason": c.reason, "parent_folder": c.parent_folder,
-                 "vin": c.vin, "status": c.status}
-                for c in self.changes
-            ],
+            "changes": [self._change_record(c) for c in self.changes],
             "warnings": self.warnings,
         }
         path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
@@ -772,6 +1338,7 @@ _TALON_CIV_PRIORITY = [
 # Reverse lookup: short filename stem → category
 # Built from _CAT_SHORT_NAMES so renamed files are recognized back
 _SHORT_NAME_TO_CAT = {}  # populated after _CAT_SHORT_NAMES is defined
+_NUM_SUFFIX = re.compile(r'_\d+$')
 
 
 def _build_short_name_reverse():
@@ -789,14 +1356,17 @@ def _build_short_name_reverse():
     _SHORT_NAME_TO_CAT["supliment_cesiune"] = "Cesiune / Supliment"
 
 
+# Pure in the file name; output folders repeat the same short names
+# (cc.pdf, op_2.pdf) across every VIN, so inventory and rescan passes mostly hit.
+@lru_cache(maxsize=4096)
 def categorize_file(fn: str) -> str:
     # Skip system files entirely
     if fn in _IGNORE_FILES:
         return None
     # ── Recognise our own short names (cc.pdf, subct_1.pdf, etc.) ────
-    stem = Path(fn).stem.lower()
+    stem = os.path.splitext(fn)[0].lower()
     # Strip trailing _N numbering  (e.g. "cc_2" → "cc", "op_14" → "op")
-    base = re.sub(r'_\d+$', '', stem)
+    base = _NUM_SUFFIX.sub('', stem)
     cat = _SHORT_NAME_TO_CAT.get(base)
     if cat:
         return cat
@@ -825,46 +1395,54 @@ def build_inventory(output_root: Path, range_start: int = 0, range_end: int = 0,
     inventory = {}
 
     try:
-        top_entries = sorted(output_root.iterdir())
+        with os.scandir(output_root) as it:
+            part_dirs = sorted((e.name, e.path) for e in it if e.is_dir())
     except OSError as exc:
         print(f"  WARNING: Cannot list output directory '{output_root}': {exc}",
               file=sys.stderr)
         return inventory
 
-    part_dirs = [d for d in top_entries if d.is_dir()]
-    for part_dir in part_dirs:
-        dname = part_dir.name
+    for dname, part_path in part_dirs:
         # Skip hidden/special dirs and files with extensions
         if dname.startswith(("_", ".")) or "." in dname:
             continue
         try:
-            for vin_dir in sorted(part_dir.iterdir()):
-                if not vin_dir.is_dir() or not is_vin(vin_dir.name):
-                    continue
-                vin = vin_dir.name
-                if vin not in inventory:
-                    inventory[vin] = {
-                        "_partition": dname,
-                        "_actual_partition": dname,
-                        "_files": defaultdict(list),
-                    }
-                for f in vin_dir.rglob('*'):
-                    if f.is_file():
-                        cat = categorize_file(f.name)
-                        if cat is None:
-                            continue
-                        rel = f.relative_to(vin_dir)
-                        display_name = f.name
-                        if original_names:
-                            display_name = original_names.get((vin, f.name), f.name)
-                        display_rel = str(rel.parent / display_name) if rel.parent != Path('.') \
-                            else display_name
-                        inventory[vin]["_files"][cat].append(display_rel)
+            with os.scandir(part_path) as it:
+                vin_dirs = sorted((e.name, e.path) for e in it
+                                  if e.is_dir() and is_vin(e.name))
         except PermissionError:
-            pass
+            continue
+        for vin, vin_path in vin_dirs:
+            if vin not in inventory:
+                inventory[vin] = {
+                    "_partition": dname,
+                    "_actual_partition": dname,
+                    "_files": defaultdict(set),
+                }
+            files = inventory[vin]["_files"]
+            prefix_len = len(vin_path) + 1
+            for dirpath, _dirs, filenames in os.walk(vin_path):
+                rel_dir = dirpath[prefix_len:]
+                for fn in filenames:
+                    cat = categorize_file(fn)
+                    if cat is None:
+                        continue
+                    display_name = fn
+                    if original_names:
+                        display_name = original_names.get((vin, fn), fn)
+                    files[cat].add(os.path.join(rel_dir, display_name) if rel_dir
+                                   else display_name)
     return inventory
 
 
+def _output_parts(dest: str, root_prefix: str):
+    """Split a planned destination into its components below the output root
+    (root_prefix = output root + separator). None if dest is outside it."""
+    if not dest.startswith(root_prefix):
+        return None
+    return dest[len(root_prefix):].split(os.sep)
+
+
 def build_inventory_from_ledger(ledger, output_root: Path,
                                 original_names: dict = None) -> dict:
     """Build inventory purely from the planning ledger.
@@ -872,6 +1450,7 @@ def build_inventory_from_ledger(ledger, output_root: Path,
     No output directory checks needed — the planning step already determined
     what goes where."""
     inventory = {}
+    root_prefix = os.path.join(os.fspath(output_root), "")
 
     for change in ledger.changes:
         if change.action != "copy_file":
@@ -879,15 +1458,10 @@ def build_inventory_from_ledger(ledger, output_root: Path,
         vin = change.vin
         if not vin or not is_vin(vin):
             continue
-        dest = Path(change.destination)
 
-        # Extract partition name from destination path
-        try:
-            rel = dest.relative_to(output_root)
-        except ValueError:
-            continue
-        parts = rel.parts
-        if len(parts) < 2:
+        # Destination: <output_root>/<partition>/[<VIN>/[subdirs/]]<file>
+        parts = _output_parts(change.destination, root_prefix)
+        if parts is None or len(parts) < 2:
             continue
         partition_name = parts[0]
 
@@ -895,11 +1469,11 @@ def build_inventory_from_ledger(ledger, output_root: Path,
             inventory[vin] = {
                 "_partition": partition_name,
                 "_actual_partition": partition_name,
-                "_files": defaultdict(list),
+                "_files": defaultdict(set),
             }
 
         # The planned destination filename (after rename if applicable)
-        actual_fn = dest.name
+        actual_fn = parts[-1]
         cat = categorize_file(actual_fn)
         if cat is None:
             continue
@@ -909,19 +1483,11 @@ def build_inventory_from_ledger(ledger, output_root: Path,
         if original_names:
             display_name = original_names.get((vin, actual_fn), actual_fn)
 
-        # Preserve subdir structure (e.g. contracte/cc.pdf)
-        vin_base = output_root / partition_name / vin
-        try:
-            file_rel = dest.relative_to(vin_base)
-        except ValueError:
-            file_rel = Path(actual_fn)
-        if file_rel.parent != Path('.'):
-            display_rel = str(file_rel.parent / display_name)
-        else:
-            display_rel = display_name
+        # Preserve subdir structure below the VIN folder (e.g. contracte/cc.pdf)
+        subdirs = parts[2:-1] if len(parts) > 2 and parts[1] == vin else ()
+        display_rel = os.path.join(*subdirs, display_name) if subdirs else display_name
 
-        if display_rel not in inventory[vin]["_files"][cat]:
-            inventory[vin]["_files"][cat].append(display_rel)
+        inventory[vin]["_files"][cat].add(display_rel)
 
     return inventory
 
@@ -929,17 +1495,6 @@ def build_inventory_from_ledger(ledger, output_root: Path,
 # ── Category-aware filename renaming ────────────────────────────────────────
 
 
-def _file_hash(path_str: str) -> str:
-    """MD5 hash of file contents for deduplication."""
-    h = hashlib.md5()
-    try:
-        with open(_long(path_str), 'rb') as f:
-            for chunk in iter(lambda: f.read(65536), b''):
-                h.update(chunk)
-    except OSError:
-        return f"__error_{path_str}"
-    return h.hexdigest()
-
 # Pre-computed hash cache, populated in bulk by plan_category_renames
 _hash_cache: dict = {}
 
@@ -1211,6 +1766,12 @@ _CONTENT_CATEGORY_PATTERNS = {
     ],
 }
 
+# Every content pattern as one alternation (flags scoped per branch): a single
+# search finds the earliest position at which any category matches.
+_CONTENT_ANY = re.compile("|".join(
+    f"(?{'i' if pat.flags & re.I else ''}:{pat.pattern})"
+    for patterns in _CONTENT_CATEGORY_PATTERNS.values() for pat in patterns))
+
 # Priority order for content classification (first match wins)
 _CONTENT_PRIORITY = ["Facturi", "TALON / CIV", "Contract Cadru", "Subcontract", "CASCO", "RCA"]
 
@@ -1251,16 +1812,24 @@ def _best_content_category(text: str) -> Optional[str]:
     Uses first-match-by-position: the category whose keyword appears
     earliest in the text wins, since documents typically identify
     themselves in the title/header. Count is used as tiebreaker for
-    same-position matches."""
-    positions = _earliest_content_match(text)
-    if not positions:
+    same-position matches.
+
+    Same result as ranking _earliest_content_match() by (position, -count),
+    without searching and counting every pattern over the whole text: one
+    combined search gives the winning position, anchored matches there find
+    the categories tied on it, and only a real tie is counted."""
+    m = _CONTENT_ANY.search(text)
+    if not m:
         return None
-    counts = _count_content_matches(text)
-    # Sort by (position, -count) — earliest position wins,
-    # on same position highest count breaks tie
-    best = min(positions.keys(),
-               key=lambda c: (positions[c], -counts.get(c, 0)))
-    return best
+    pos = m.start()
+    tied = [cat for cat, patterns in _CONTENT_CATEGORY_PATTERNS.items()
+            if any(pat.match(text, pos) for pat in patterns)]
+    if len(tied) == 1:
+        return tied[0]
+    # On same position highest count breaks tie (first category on equal count)
+    counts = {cat: sum(len(pat.findall(text)) for pat in _CONTENT_CATEGORY_PATTERNS[cat])
+              for cat in tied}
+    return max(tied, key=counts.__getitem__)
 
 
 def _scan_pdf_for_category(pdf_path: str, ocr: bool = False) -> Optional[str]:
@@ -1294,6 +1863,15 @@ def _scan_pdf_for_category(pdf_path: str, ocr: bool = False) -> Optional[str]:
     return _best_content_category(text)
 
 
+def _scan_category_task(pdf_path: str, ocr: bool) -> tuple:
+    """Pool task: (category, error message or None).  Errors come back as
+    values so one bad PDF cannot end the whole pool.map."""
+    try:
+        return _scan_pdf_for_category(pdf_path, ocr=ocr), None
+    except Exception as exc:
+        return None, f"{type(exc).__name__}: {exc}"
+
+
 def reclassify_by_content(inventory: dict, output_root: Path, workers: int = 4,
                           ocr: bool = False, rename_on_disk: bool = False):
     """Post-copy phase: scan 'Alte Documente' PDFs by content to find
@@ -1317,8 +1895,8 @@ def reclassify_by_content(inventory: dict, output_root: Path, workers: int = 4,
         if not missing:
             continue
         # Collect Alte Documente PDFs for scanning
-        alte = files.get("Alte Documente", [])
-        for rel in alte:
+        alte = files.get("Alte Documente", ())
+        for rel in sorted(alte):
             if not rel.lower().endswith('.pdf'):
                 continue
             part = data.get("_actual_partition", data["_partition"])
@@ -1336,7 +1914,15 @@ def reclassify_by_content(inventory: dict, output_root: Path, workers: int = 4,
     import concurrent.futures
     results = []
     scan_errors = 0
-    PDF_TIMEOUT = 30
+
+    # Injected/known results never need a worker (and a spawned worker would
+    # not see entries added to _reclass_cache at runtime anyway)
+    to_scan = []
+    for t in scan_tasks:
+        if t[2] in _reclass_cache:
+            results.append((t[0], t[1], _reclass_cache[t[2]], t[3]))
+        else:
+            to_scan.append(t)
 
     # ── Pre-filter: separate cached / text-rich / needs-OCR ──────────
     cached_count = 0
@@ -1344,7 +1930,7 @@ def reclassify_by_content(inventory: dict, output_root: Path, workers: int = 4,
     ocr_scan_tasks = []
 
     if ocr:
-        for t in scan_tasks:
+        for t in to_scan:
             abs_path = t[2]
             # Check persistent cache first (instant)
             entry = _ocr_disk_cache.get(abs_path)
@@ -1364,7 +1950,7 @@ def reclassify_by_content(inventory: dict, output_root: Path, workers: int = 4,
                   f"{len(ocr_scan_tasks)} need OCR",
                   file=sys.stderr, flush=True)
     else:
-        text_tasks = scan_tasks
+        text_tasks = to_scan
 
     total_to_scan = len(text_tasks) + len(ocr_scan_tasks)
     print(f"  Scanning {total_to_scan} Alte Documente PDFs across "
@@ -1375,56 +1961,42 @@ def reclassify_by_content(inventory: dict, output_root: Path, workers: int = 4,
                unit="pdf", bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} "
                "[{elapsed}<{remaining}, {rate_fmt}]")
 
-    def _do_scan_batch(tasks, use_ocr):
+    def _record(task, cat, err, use_ocr):
         nonlocal scan_errors
+        vin, rel, abs_path, missing = task
+        if err:
+            scan_errors += 1
+            tqdm.write(f"  WARNING: Content scan failed: {abs_path}: {err}")
+        else:
+            results.append((vin, rel, cat, missing))
+            if use_ocr:
+                _ocr_cache_store(abs_path, reclass_cat=cat)
+        bar.update(1)
+
+    def _do_scan_batch(tasks, use_ocr):
         if not tasks:
             return
-        timeout = PDF_TIMEOUT if use_ocr else 120
+        done = 0
         if workers > 1:
+            # map() keeps task order (so results are deterministic) and ships
+            # tasks in chunks, amortising the per-task pickling round-trip
+            chunk = max(1, min(8, len(tasks) // (workers * 4)))
             try:
                 with concurrent.futures.ProcessPoolExecutor(
                         max_workers=workers,
                         initializer=_ocr_pool_init,
                         initargs=(_OCR_DPI, _OCR_MAX_PAGES, _OCR_TESS_CONFIG)) as pool:
-                    futs = {pool.submit(_scan_pdf_for_category, t[2], use_ocr): t
-                            for t in tasks}
-                    for f in concurrent.futures.as_completed(futs):
-                        bar.update(1)
-                        task = futs[f]
-                        vin, rel, abs_path, missing = task
-                        try:
-                            cat = f.result(timeout=timeout)
-                            results.append((vin, rel, cat, missing))
-                            if use_ocr:
-                                _ocr_cache_store(abs_path, reclass_cat=cat)
-                        except concurrent.futures.TimeoutError:
-                            scan_errors += 1
-                            tqdm.write(f"  WARNING: Content scan timed out: {abs_path}")
-                        except Exception as exc:
-                            scan_errors += 1
-                            tqdm.write(f"  WARNING: Content scan failed: {abs_path}: {exc}")
-            except Exception:
-                for t in tasks:
-                    vin, rel, abs_path, missing = t
-                    try:
-                        cat = _scan_pdf_for_category(abs_path, ocr=use_ocr)
-                        results.append((vin, rel, cat, missing))
-                        if use_ocr:
-                            _ocr_cache_store(abs_path, reclass_cat=cat)
-                    except Exception:
-                        scan_errors += 1
-                    bar.update(1)
-        else:
-            for t in tasks:
-                vin, rel, abs_path, missing = t
-                try:
-                    cat = _scan_pdf_for_category(abs_path, ocr=use_ocr)
-                    results.append((vin, rel, cat, missing))
-                    if use_ocr:
-                        _ocr_cache_store(abs_path, reclass_cat=cat)
-                except Exception:
-                    scan_errors += 1
-                bar.update(1)
+                    for t, (cat, err) in zip(tasks, pool.map(
+                            _scan_category_task, [t[2] for t in tasks],
+                            [use_ocr] * len(tasks), chunksize=chunk)):
+                        _record(t, cat, err, use_ocr)
+                        done += 1
+            except Exception as exc:
+                # Pool unavailable or broken: finish the rest in-process
+                tqdm.write(f"  WARNING: Content scan pool failed ({exc}); "
+                           f"scanning {len(tasks) - done} PDFs in-process")
+        for t in tasks[done:]:
+            _record(t, *_scan_category_task(t[2], use_ocr), use_ocr)
 
     _do_scan_batch(text_tasks, False)
     _do_scan_batch(ocr_scan_tasks, True)
@@ -1442,7 +2014,7 @@ def reclassify_by_content(inventory: dict, output_root: Path, workers: int = 4,
         if detected_cat not in missing:
             continue
         files = inventory[vin]["_files"]
-        if rel in files.get("Alte Documente", []):
+        if rel in files.get("Alte Documente", ()):
             new_rel = rel  # default: keep same path
 
             if rename_on_disk:
@@ -1476,8 +2048,8 @@ def reclassify_by_content(inventory: dict, output_root: Path, workers: int = 4,
                             except OSError as exc:
                                 tqdm.write(f"  WARNING: rename failed {rel} → {new_name}: {exc}")
 
-            files["Alte Documente"].remove(rel)
-            files[detected_cat].append(new_rel)
+            files["Alte Documente"].discard(rel)
+            files[detected_cat].add(new_rel)
             reclassified += 1
 
     stats = {"scanned": len(scan_tasks), "reclassified": reclassified,
@@ -1488,58 +2060,111 @@ def reclassify_by_content(inventory: dict, output_root: Path, workers: int = 4,
     return stats
 
 
-def write_inventory_excel(excel_path: Path, inventory: dict):
-    """Write inventory Excel from scratch. No merge with old data."""
-    if not HAS_OPENPYXL:
-        print("  openpyxl not installed, skipping Excel. pip install openpyxl")
-        return
+def _inventory_rows(inventory: dict, cat_names: list):
+    """Yield one plain row tuple per VIN, sorted by VIN."""
+    for vin, info in sorted(inventory.items()):
+        files = info["_files"]
+        total = sum(len(v) for v in files.values())
+        yield ((vin, info["_partition"])
+               + tuple("\n".join(sorted(files.get(cat, ()))) for cat in cat_names)
+               + (total,))
+
+
+def _write_inventory_xlsxwriter(excel_path: Path, inventory: dict,
+                                cat_names: list, headers: list, widths: list) -> int:
+    """Stream the inventory with xlsxwriter in constant_memory mode: rows are
+    flushed to disk as they are written, so memory stays flat in VIN count."""
+    wb = xlsxwriter.Workbook(str(excel_path),
+                             {'constant_memory': True, 'strings_to_urls': False})
+    ws = wb.add_worksheet("Inventory")
+    hdr_fmt = wb.add_format({
+        "font_name": "Arial", "bold": True, "font_color": "#FFFFFF", "font_size": 11,
+        "bg_color": "#2F5496", "align": "center", "valign": "vcenter",
+        "text_wrap": True, "border": 1, "border_color": "#CCCCCC"})
+    # Same per-column styling as the openpyxl writer: bordered cells, with the
+    # category columns (file lists) top-aligned and wrapped
+    cell_fmt = wb.add_format({"border": 1, "border_color": "#CCCCCC"})
+    wrap_fmt = wb.add_format({"valign": "top", "text_wrap": True,
+                              "border": 1, "border_color": "#CCCCCC"})
+    for i, w in enumerate(widths):
+        ws.set_column(i, i, w)
+    ws.write_row(0, 0, headers, hdr_fmt)
+    ws.freeze_panes(1, 0)
+
+    n = 0
+    last = len(headers) - 1
+    for n, row in enumerate(_inventory_rows(inventory, cat_names), 1):
+        ws.write_row(n, 0, row[:2], cell_fmt)
+        ws.write_row(n, 2, row[2:last], wrap_fmt)
+        ws.write(n, last, row[last], cell_fmt)
+    ws.autofilter(0, 0, n, last)
+    wb.close()
+    return n
+
+
+def _write_inventory_openpyxl(excel_path: Path, inventory: dict,
+                              cat_names: list, headers: list, widths: list) -> int:
+    """Fallback writer: openpyxl in write-only mode, which serialises each
+    appended row immediately instead of keeping a Cell object per value.
+    Without lxml openpyxl serialises with its pure-Python XML backend,
+    several times slower on large inventories, so that is reported."""
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
 
-    cat_names = [c[0] for c in DOC_CATEGORIES] + ["Alte Documente"]
-    headers = ["VIN", "Partition"] + cat_names + ["Total Files"]
+    if not openpyxl.LXML:
+        print("  WARNING: lxml not installed, openpyxl writes the inventory with "
+              "its slow pure-Python serializer. pip install lxml", file=sys.stderr)
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Inventory"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Inventory")
 
-    hdr_font = Font(name="Arial", bold=True, color="FFFFFF", size=11)
-    hdr_fill = PatternFill("solid", fgColor="2F5496")
-    hdr_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
     thin = Side(style="thin", color="CCCCCC")
     brd = Border(top=thin, bottom=thin, left=thin, right=thin)
+    hdr_style = dict(font=Font(name="Arial", bold=True, color="FFFFFF", size=11),
+                     fill=PatternFill("solid", fgColor="2F5496"),
+                     alignment=Alignment(horizontal="center", vertical="center",
+                                         wrap_text=True),
+                     border=brd)
     wrap = Alignment(vertical="top", wrap_text=True)
 
-    widths = [20, 38] + [35] * len(cat_names) + [12]
-    for i, (h, w) in enumerate(zip(headers, widths), 1):
-        c = ws.cell(row=1, column=i, value=h)
-        c.font = hdr_font
-        c.fill = hdr_fill
-        c.alignment = hdr_align
-        c.border = brd
-        ws.column_dimensions[c.column_letter].width = w
+    # Sheet properties must be set before the first append in write-only mode
+    for i, w in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(i)].width = w
     ws.freeze_panes = "A2"
 
-    row = 2
-    for vin in sorted(inventory.keys()):
-        info = inventory[vin]
-        partition = info["_partition"]
-        files = info["_files"]
-        total = sum(len(v) for v in files.values())
-        ws.cell(row=row, column=1, value=vin).border = brd
-        ws.cell(row=row, column=2, value=partition).border = brd
-        for ci, cat in enumerate(cat_names):
-            cell = ws.cell(row=row, column=ci + 3,
-                           value="\n".join(sorted(files.get(cat, []))))
-            cell.border = brd
-            cell.alignment = wrap
-        ws.cell(row=row, column=len(headers), value=total).border = brd
-        row += 1
+    def _cell(value, **style):
+        c = WriteOnlyCell(ws, value=value)
+        for k, v in style.items(): setattr(c, k, v)
+        return c
 
-    from openpyxl.utils import get_column_letter
-    last_col = get_column_letter(len(headers))
-    ws.auto_filter.ref = f"A1:{last_col}{row - 1}"
+    ws.append([_cell(h, **hdr_style) for h in headers])
+    n = 0
+    last = len(headers)
+    for n, values in enumerate(_inventory_rows(inventory, cat_names), 1):
+        ws.append([_cell(v, border=brd, alignment=wrap) if 3 <= ci < last
+                   else _cell(v, border=brd)
+                   for ci, v in enumerate(values, 1)])
+    ws.auto_filter.ref = f"A1:{get_column_letter(last)}{n + 1}"
 
     wb.save(str(excel_path))
-    print(f"  Inventory Excel: {excel_path}  ({row - 2} VINs)")
+    return n
+
+
+def write_inventory_excel(excel_path: Path, inventory: dict):
+    """Write inventory Excel from scratch. No merge with old data.
+    Uses xlsxwriter (streaming) when installed, otherwise openpyxl."""
+    if not HAS_XLSXWRITER and not HAS_OPENPYXL:
+        print("  openpyxl not installed, skipping Excel. pip install openpyxl")
+        return
+
+    cat_names = [c[0] for c in DOC_CATEGORIES] + ["Alte Documente"]
+    headers = ["VIN", "Partition"] + cat_names + ["Total Files"]
+    widths = [20, 38] + [35] * len(cat_names) + [12]
+
+    writer = _write_inventory_xlsxwriter if HAS_XLSXWRITER else _write_inventory_openpyxl
+    n = writer(excel_path, inventory, cat_names, headers, widths)
+    print(f"  Inventory Excel: {excel_path}  ({n} VINs)")
 
 
 # ── Folder planning ──────────────────────────────────────────────────────────
@@ -1547,8 +2172,8 @@ def write_inventory_excel(excel_path: Path, inventory: dict):
 def get_parent_vin(folder: Path) -> Optional[str]:
     fl_vins, seriec_vins, other_vins = [], [], []
     try:
-        for item in folder.iterdir():
-            if not item.is_file() or item.suffix.lower() != '.pdf': continue
+        for item, _, is_file in _list_dir(folder):
+            if not is_file or item.suffix.lower() != '.pdf': continue
             fn = item.name
             m = FL_PATTERN.match(fn)
             if m: fl_vins.append(m.group(1)); continue
@@ -1566,12 +2191,16 @@ def get_parent_vin(folder: Path) -> Optional[str]:
 def _copy_dir_files(src_dir: Path, dst_dir: Path, ledger: Ledger,
                     parent_folder: str, vin: str, reason: str):
     """Plan copy_file for every file recursively under src_dir → dst_dir."""
+    # Destinations are built as strings (Ledger stores str anyway): slicing
+    # the source prefix off and joining skips a relative_to() and a Path
+    # concatenation per file.
+    cut = len(os.path.join(str(src_dir), ""))
+    dst_str = str(dst_dir)
+    join = os.path.join
     try:
-        for item in sorted(src_dir.rglob('*')):
-            if item.is_file():
-                rel = item.relative_to(src_dir)
-                ledger.add("copy_file", item, dst_dir / rel,
-                           reason=reason, parent_folder=parent_folder, vin=vin)
+        for item in _walk_files(src_dir):
+            ledger.add("copy_file", item, join(dst_str, str(item)[cut:]),
+                       reason=reason, parent_folder=parent_folder, vin=vin)
     except PermissionError:
         ledger.warn(f"Cannot read '{src_dir}'")
 
@@ -1582,8 +2211,8 @@ def plan_vin_folder(folder: Path, out_partition: Path, ledger: Ledger):
     target = out_partition / vin
 
     try:
-        for item in sorted(folder.iterdir()):
-            if item.is_dir():
+        for item, is_dir, is_file in _list_dir(folder):
+            if is_dir:
                 if is_vin(item.name):
                     _copy_dir_files(item, out_partition / item.name, ledger,
                                     parent_folder=vin, vin=item.name,
@@ -1592,7 +2221,7 @@ def plan_vin_folder(folder: Path, out_partition: Path, ledger: Ledger):
                     _copy_dir_files(item, target / item.name, ledger,
                                     parent_folder=vin, vin=vin,
                                     reason="Copy subdir contents")
-            elif item.is_file():
+            elif is_file:
                 ledger.add("copy_file", item, target / item.name,
                            reason="Copy from VIN folder", parent_folder=vin, vin=vin)
     except PermissionError:
@@ -1618,14 +2247,14 @@ def plan_multi_car(folder: Path, vin_subdirs: list,
 
     # 2. Copy remaining files/subdirs → parent VIN folder in output
     try:
-        for item in sorted(folder.iterdir()):
-            if item.is_dir():
+        for item, is_dir, is_file in _list_dir(folder):
+            if is_dir:
                 if item.name in vin_subdir_names:
                     continue
                 _copy_dir_files(item, target / item.name, ledger,
                                 parent_folder=name, vin=parent_vin,
                                 reason="Copy subdir to parent VIN")
-            elif item.is_file():
+            elif is_file:
                 ledger.add("copy_file", item, target / item.name,
                            reason="Copy to parent VIN", parent_folder=name, vin=parent_vin)
     except PermissionError:
@@ -1639,8 +2268,9 @@ def plan_flat(folder: Path, out_partition: Path, ledger: Ledger, scan_pdf: bool)
     all_fn_vins: set = set()
     all_vins_for_election: set = set()
     try:
-        for item in folder.iterdir():
-            if not item.is_file(): continue
+        entries = _list_dir(folder)
+        for item, _, is_file in entries:
+            if not is_file: continue
             fn_vins = set(extract_all_vins(item.name))
             file_fn_vins[item.name] = fn_vins
             all_fn_vins |= fn_vins
@@ -1665,12 +2295,12 @@ def plan_flat(folder: Path, out_partition: Path, ledger: Ledger, scan_pdf: bool)
             if file_fn_vins:  # only if folder actually has files
                 no_vin_target = out_partition / "_NO_VIN" / name
                 try:
-                    for item in sorted(folder.iterdir()):
-                        if item.is_dir():
+                    for item, is_dir, is_file in entries:
+                        if is_dir:
                             _copy_dir_files(item, no_vin_target / item.name, ledger,
                                             parent_folder=name, vin="_NO_VIN",
                                             reason="No VIN found — preserve in _NO_VIN")
-                        elif item.is_file():
+                        elif is_file:
                             ledger.add("copy_file", item, no_vin_target / item.name,
                                        reason="No VIN found — preserve in _NO_VIN",
                                        parent_folder=name, vin="_NO_VIN")
@@ -1701,8 +2331,8 @@ def plan_flat(folder: Path, out_partition: Path, ledger: Ledger, scan_pdf: bool)
     copied_out = set()
 
     if other_vins:
-        for item in folder.iterdir():
-            if not item.is_file(): continue
+        for item, _, is_file in entries:
+            if not is_file: continue
             fn = item.name
             fvins = file_fn_vins.get(fn, set())
             if not fvins or fvins == {keeper}: continue
@@ -1722,8 +2352,8 @@ def plan_flat(folder: Path, out_partition: Path, ledger: Ledger, scan_pdf: bool)
 
     # Copy remaining files → keeper VIN folder in output
     try:
-        for item in sorted(folder.iterdir()):
-            if item.is_dir():
+        for item, is_dir, is_file in entries:
+            if is_dir:
                 if is_vin(item.name):
                     _copy_dir_files(item, out_partition / item.name, ledger,
                                     parent_folder=name, vin=item.name,
@@ -1732,7 +2362,7 @@ def plan_flat(folder: Path, out_partition: Path, ledger: Ledger, scan_pdf: bool)
                     _copy_dir_files(item, target / item.name, ledger,
                                     parent_folder=name, vin=keeper,
                                     reason="Copy subdir to keeper VIN")
-            elif item.is_file():
+            elif is_file:
                 if item.name in copied_out: continue
                 ledger.add("copy_file", item, target / item.name,
                            reason="Copy to keeper VIN", parent_folder=name, vin=keeper)
@@ -1744,152 +2374,206 @@ def plan_flat(folder: Path, out_partition: Path, ledger: Ledger, scan_pdf: bool)
 
 def scan_and_plan(root: Path, output_root: Path, ledger: Ledger, scan_pdf: bool,
                   range_start: int = 0, range_end: int = 0, workers: int = 1):
-    stats = defaultdict(int)
-    stats_lock = threading.Lock()
+    """Classify every client folder and plan its copies.
 
-    all_folders = []
-    for part_dir in _get_partition_dirs(root, range_start, range_end):
+    With workers > 1 both levels run on a thread pool: partitions are listed
+    concurrently, then every client folder is one task (the pool's shared
+    queue keeps all workers busy regardless of folder size).  Each task plans
+    into its own Ledger and returns local stats; shards are merged into
+    `ledger` in sorted folder order, so the plan is identical to a
+    sequential run."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _list_partition(part_dir):
         try:
-            for cdir in sorted(part_dir.iterdir()):
-                if cdir.is_dir():
-                    all_folders.append((cdir, part_dir.name))
+            return [(cdir, part_dir.name) for cdir, is_dir, _ in _list_dir(part_dir)
+                    if is_dir]
         except PermissionError:
-            pass
+            return []
+
+    part_dirs = _get_partition_dirs(root, range_start, range_end)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            listings = list(pool.map(_list_partition, part_dirs))
+    else:
+        listings = [_list_partition(p) for p in part_dirs]
+    all_folders = [item for listing in listings for item in listing]
+    # Every folder of a partition lands in the same merged output partition:
+    # resolve it once per partition rather than per folder.
+    out_partitions = {name: output_root / merge_partition_name(name)
+                      for name in {pname for _, pname in all_folders}}
 
     bar = tqdm(total=len(all_folders), desc="Scanning folders", unit="folder",
                bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]")
 
-    def _process_folder(cdir, partition_name):
-        out_partition = output_root / merge_partition_name(partition_name)
+    def _process_folder(cdir, partition_name, shard):
+        out_partition = out_partitions[partition_name]
+        stats = Counter()
 
         if is_vin(cdir.name):
-            with stats_lock:
-                stats["vin_named"] += 1
-            plan_vin_folder(cdir, out_partition, ledger)
-            bar.update(1)
-            return
+            stats["vin_named"] += 1
+            plan_vin_folder(cdir, out_partition, shard)
+            return stats
 
         vin_subdirs = []
         has_files = False
         has_other_dirs = False
         try:
-            for sub in cdir.iterdir():
-                if sub.is_dir():
+            for sub, is_dir, is_file in _list_dir(cdir):
+                if is_dir:
                     if is_vin(sub.name): vin_subdirs.append(sub)
                     else: has_other_dirs = True
-                elif sub.is_file(): has_files = True
+                elif is_file: has_files = True
         except PermissionError:
-            ledger.warn(f"Cannot read '{cdir.name}'")
-            with stats_lock:
-                stats["error"] += 1
-            bar.update(1)
-            return
+            shard.warn(f"Cannot read '{cdir.name}'")
+            stats["error"] += 1
+            return stats
 
         if not vin_subdirs and not has_files and not has_other_dirs:
-            bar.update(1)
-            return
+            return stats
 
         if vin_subdirs:
-            with stats_lock:
-                stats["multi_car"] += 1
-            plan_multi_car(cdir, vin_subdirs, out_partition, ledger, scan_pdf)
+            stats["multi_car"] += 1
+            plan_multi_car(cdir, vin_subdirs, out_partition, shard, scan_pdf)
         else:
-            with stats_lock:
-                stats["flat"] += 1
-            plan_flat(cdir, out_partition, ledger, scan_pdf)
-        bar.update(1)
+            stats["flat"] += 1
+            plan_flat(cdir, out_partition, shard, scan_pdf)
+        return stats
 
+    stats = Counter()
     if workers > 1:
-        from concurrent.futures import ThreadPoolExecutor, as_completed
+        from concurrent.futures import as_completed
+        shards = [Ledger() for _ in all_folders]
         with ThreadPoolExecutor(max_workers=workers) as pool:
-            futs = [pool.submit(_process_folder, cdir, pname)
-                    for cdir, pname in all_folders]
+            futs = [pool.submit(_process_folder, cdir, pname, shard)
+                    for (cdir, pname), shard in zip(all_folders, shards)]
             for f in as_completed(futs):
                 try:
-                    f.result()
+                    stats += f.result()
                 except Exception as exc:
                     tqdm.write(f"  WARNING: Folder scan error: {exc}")
+                bar.update(1)
+        for shard in shards:
+            ledger.merge(shard)
     else:
         for cdir, partition_name in all_folders:
-            _process_folder(cdir, partition_name)
+            stats += _process_folder(cdir, partition_name, ledger)
+            bar.update(1)
 
     bar.close()
-    return stats
+    return defaultdict(int, stats)
 
 
-def plan_pdf_cross_copies(ledger: Ledger, output_root: Path):
-    """Post-planning pass: for every PDF being copied, check its text content
-    for VINs and cross-copy to all matching VIN folders.
-    PDFs with >MAX_CROSS_COPY_VINS are skipped to avoid bloat."""
-    stats = {"cross_copied": 0, "skipped_too_many": 0, "pdfs_checked": 0}
+def _index_pdf_plan(ledger: Ledger, output_root: Path) -> dict:
+    """One pass over the ledger collecting everything the PDF cross-copy and
+    gap-fill phases need.  The phases keep it current as they add copies."""
+    root_prefix = os.path.join(os.fspath(output_root), "")
+    vin_partition: dict = {}          # vin -> partition output path (str)
+    already_planned: set = set()      # (source_str, vin)
+    vin_categories = defaultdict(set)  # vin -> critical cats already planned
+    pdf_changes: list = []            # planned PDF copies, in ledger order
+    pdf_info: dict = {}               # source_str -> (critical cats, content_vins)
 
-    # Build VIN → output partition path from planned changes
-    vin_partition: dict = {}  # vin -> partition dir path
     for c in ledger.changes:
-        if not c.vin or c.action not in ("copy_file", "create_folder"):
+        if c.action not in ("copy_file", "create_folder"):
             continue
-        dst = Path(c.destination)
-        # destination looks like: output_root / partition / VIN / file.pdf
-        # or output_root / partition / VIN / subdir / file.pdf
-        # We need the partition component
-        try:
-            rel = dst.relative_to(output_root)
-            parts = rel.parts
-            if len(parts) >= 2:
-                partition_name = parts[0]
-                vin_partition[c.vin] = output_root / partition_name
-        except ValueError:
-            pass
+        if c.vin:
+            # destination looks like: output_root / partition / VIN / [subdir /] file
+            # (a planned folder alone is enough to place its VIN)
+            parts = _output_parts(c.destination, root_prefix)
+            if parts is not None and len(parts) >= 2:
+                vin_partition[c.vin] = root_prefix + parts[0]
+        if c.action != "copy_file":
+            continue
+        already_planned.add((c.source, c.vin))
+        if c.vin:
+            _note_critical(vin_categories, c.vin, os.path.basename(c.destination), c.source)
+        if os.path.splitext(c.source)[1].lower() != '.pdf':
+            continue
+        pdf_changes.append(c)
+        src_str = c.source
+        if src_str in pdf_info:
+            continue
+        content_vins = _pdf_cache.get(src_str, set())
+        if not content_vins:
+            continue
+        # Combine filename category + content categories
+        cats = set()
+        fn_cat = _pdf_critical_category(os.path.basename(src_str))
+        if fn_cat:
+            cats.add(fn_cat)
+        cats |= (_pdf_content_cats.get(src_str, set()) & _CRITICAL_CATEGORIES)
+        if cats:
+            pdf_info[src_str] = (cats, content_vins)
 
-    # Track what's already planned: (source_str, vin) pairs
-    already_planned = set()
-    for c in ledger.changes:
-        if c.action == "copy_file":
-            already_planned.add((c.source, c.vin))
-
-    # Process all planned copy_file ops for PDFs
-    # Snapshot the list since we'll append
-    original_changes = list(ledger.changes)
-    pdf_changes = [c for c in original_changes if c.action == "copy_file"
-                   and Path(c.source).suffix.lower() == '.pdf']
+    return {"vin_partition": vin_partition, "already_planned": already_planned,
+            "vin_categories": vin_categories, "pdf_changes": pdf_changes,
+            "pdf_info": pdf_info}
+
+
+def _note_critical(vin_categories: dict, vin: str, dest_fn: str, src_str: str):
+    """Record the critical categories a planned copy gives its VIN, from the
+    destination filename and the source's scanned content."""
+    fn_cat = _pdf_critical_category(dest_fn)
+    if fn_cat:
+        vin_categories[vin].add(fn_cat)
+    for cc in _pdf_content_cats.get(src_str, ()):
+        if cc in _CRITICAL_CATEGORIES:
+            vin_categories[vin].add(cc)
+
+
+def _plan_cross_copies(ledger: Ledger, idx: dict) -> dict:
+    stats = {"cross_copied": 0, "skipped_too_many": 0, "pdfs_checked": 0}
+    vin_partition = idx["vin_partition"]
+    already_planned = idx["already_planned"]
+
+    pdf_changes = idx["pdf_changes"]
     bar = tqdm(total=len(pdf_changes), desc="Cross-copy check", unit="pdf",
                bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]")
     for c in pdf_changes:
         bar.update(1)
-        src = Path(c.source)
+        src = c.source
 
         # Get content VINs from cache
-        content_vins = _pdf_cache.get(str(src), set())
+        content_vins = _pdf_cache.get(src, set())
         if not content_vins:
             continue
         stats["pdfs_checked"] += 1
 
+        src_name = os.path.basename(src)
         if len(content_vins) > MAX_CROSS_COPY_VINS:
             stats["skipped_too_many"] += 1
-            ledger.warn(f"PDF '{src.name}' has {len(content_vins)} VINs in content, "
+            ledger.warn(f"PDF '{src_name}' has {len(content_vins)} VINs in content, "
                         f"skipping cross-copy (limit={MAX_CROSS_COPY_VINS})")
             continue
 
         # Cross-copy to every VIN folder mentioned in PDF content
         for vin in sorted(content_vins):
-            if (str(src), vin) in already_planned:
+            if (src, vin) in already_planned:
                 continue
             if vin not in vin_partition:
                 # VIN not seen in any planned changes — skip
                 # (could be a VIN from a different partition range not being processed)
                 continue
-            out_part = vin_partition[vin]
-            dest = out_part / vin / src.name
+            dest = os.path.join(vin_partition[vin], vin, src_name)
             ledger.add("copy_file", src, dest,
                        reason="PDF content VIN cross-copy",
                        parent_folder=c.parent_folder, vin=vin)
-            already_planned.add((str(src), vin))
+            already_planned.add((src, vin))
+            _note_critical(idx["vin_categories"], vin, src_name, src)
             stats["cross_copied"] += 1
 
     bar.close()
     return stats
 
 
+def plan_pdf_cross_copies(ledger: Ledger, output_root: Path):
+    """Post-planning pass: for every PDF being copied, check its text content
+    for VINs and cross-copy to all matching VIN folders.
+    PDFs with >MAX_CROSS_COPY_VINS are skipped to avoid bloat."""
+    return _plan_cross_copies(ledger, _index_pdf_plan(ledger, output_root))
+
+
 # Categories that every VIN folder should ideally have
 _CRITICAL_CATEGORIES = {"Contract Cadru", "Subcontract", "CASCO", "RCA"}
 
@@ -1938,45 +2622,13 @@ def _pdf_critical_category(fn: str) -> Optional[str]:
     return None
 
 
-def plan_contract_gap_fill(ledger: Ledger, output_root: Path):
-    """Last sweep: find VINs missing critical documents (contracts, subcontracts,
-    CASCO, RCA) and fill gaps by cross-copying from PDFs that mention those VINs
-    in their content, even if those PDFs exceed the normal cross-copy VIN limit.
-    Uses BOTH filename patterns AND PDF text content to identify categories."""
+def _plan_gap_fill(ledger: Ledger, idx: dict) -> dict:
     stats = {"gap_filled": 0, "vins_with_gaps": 0}
+    vin_partition = idx["vin_partition"]
+    vin_categories = idx["vin_categories"]
+    already_planned = idx["already_planned"]
 
-    # 1. Build VIN → set of critical categories already planned
-    vin_categories: dict = defaultdict(set)  # vin -> set of critical cats
-    vin_partition: dict = {}  # vin -> partition output path
-    already_planned: set = set()  # (source_str, vin)
-
-    for c in ledger.changes:
-        if c.action != "copy_file":
-            continue
-        already_planned.add((c.source, c.vin))
-        dst = Path(c.destination)
-        fn = dst.name
-        # Check filename for critical category
-        fn_cat = _pdf_critical_category(fn)
-        if fn_cat and c.vin:
-            vin_categories[c.vin].add(fn_cat)
-        # Also check PDF content categories (from pre-scan)
-        if c.vin:
-            content_cats = _pdf_content_cats.get(c.source, set())
-            for cc in content_cats:
-                if cc in _CRITICAL_CATEGORIES:
-                    vin_categories[c.vin].add(cc)
-        # Track partitions
-        if c.vin:
-            try:
-                rel = dst.relative_to(output_root)
-                parts = rel.parts
-                if len(parts) >= 2:
-                    vin_partition[c.vin] = output_root / parts[0]
-            except ValueError:
-                pass
-
-    # 2. Find VINs with gaps
+    # Find VINs with gaps
     vins_needing = defaultdict(set)  # vin -> set of missing critical cats
     for vin in vin_partition:
         missing = _CRITICAL_CATEGORIES - vin_categories.get(vin, set())
@@ -1986,48 +2638,28 @@ def plan_contract_gap_fill(ledger: Ledger, output_root: Path):
         return stats
     stats["vins_with_gaps"] = len(vins_needing)
 
-    # 3. Build reverse index: for each PDF source, what critical categories + what VINs
-    # Uses BOTH filename patterns and PDF text content keywords
-    pdf_info: dict = {}  # source_str -> (set of critical cats, content_vins)
-    for c in ledger.changes:
-        if c.action != "copy_file":
-            continue
-        src_str = c.source
-        if src_str in pdf_info:
-            continue
-        src = Path(src_str)
-        if src.suffix.lower() != '.pdf':
-            continue
-        content_vins = _pdf_cache.get(src_str, set())
-        if not content_vins:
-            continue
-        # Combine filename category + content categories
-        cats = set()
-        fn_cat = _pdf_critical_category(src.name)
-        if fn_cat:
-            cats.add(fn_cat)
-        content_cats = _pdf_content_cats.get(src_str, set())
-        cats |= (content_cats & _CRITICAL_CATEGORIES)
-        if cats:
-            pdf_info[src_str] = (cats, content_vins)
-
-    # 4. For each VIN with gaps, find PDFs that can fill them
+    # Invert pdf_info to VIN -> PDFs mentioning it (in pdf_info order), so
+    # each gap VIN visits only its own candidates instead of every PDF
+    pdf_info = idx["pdf_info"]
+    candidates = defaultdict(list)
+    for src_str, (_, content_vins) in pdf_info.items():
+        for v in content_vins:
+            if v in vins_needing:
+                candidates[v].append(src_str)
+
+    # For each VIN with gaps, find PDFs that can fill them
+    # (pdf_info combines filename patterns and PDF text content keywords)
     for vin, missing_cats in vins_needing.items():
-        if vin not in vin_partition:
-            continue
         out_part = vin_partition[vin]
-        for src_str, (cats, content_vins) in pdf_info.items():
-            matching = cats & missing_cats
+        for src_str in candidates.get(vin, ()):
+            matching = pdf_info[src_str][0] & missing_cats
             if not matching:
                 continue
-            if vin not in content_vins:
-                continue
             if (src_str, vin) in already_planned:
                 continue
-            src = Path(src_str)
-            dest = out_part / vin / src.name
+            dest = os.path.join(out_part, vin, os.path.basename(src_str))
             filled_cat = sorted(matching)[0]  # pick one for reason label
-            ledger.add("copy_file", src, dest,
+            ledger.add("copy_file", src_str, dest,
                        reason=f"Gap-fill: {filled_cat} from PDF content",
                        parent_folder="", vin=vin)
             already_planned.add((src_str, vin))
@@ -2041,6 +2673,23 @@ def plan_contract_gap_fill(ledger: Ledger, output_root: Path):
     return stats
 
 
+def plan_contract_gap_fill(ledger: Ledger, output_root: Path):
+    """Last sweep: find VINs missing critical documents (contracts, subcontracts,
+    CASCO, RCA) and fill gaps by cross-copying from PDFs that mention those VINs
+    in their content, even if those PDFs exceed the normal cross-copy VIN limit.
+    Uses BOTH filename patterns AND PDF text content to identify categories."""
+    return _plan_gap_fill(ledger, _index_pdf_plan(ledger, output_root))
+
+
+def plan_pdf_cross_copies_and_gap_fill(ledger: Ledger, output_root: Path) -> tuple:
+    """plan_pdf_cross_copies followed by plan_contract_gap_fill, sharing one
+    index of the ledger instead of walking and re-indexing it twice.
+    Returns (cross_stats, gap_stats)."""
+    idx = _index_pdf_plan(ledger, output_root)
+    cross_stats = _plan_cross_copies(ledger, idx)
+    return cross_stats, _plan_gap_fill(ledger, idx)
+
+
 
 # ── Rescan: fix existing output in-place ─────────────────────────────────────
 
@@ -2052,6 +2701,85 @@ def _scan_pdf_full(pdf_path: str, ocr: bool = False) -> tuple:
     return _scan_single_pdf(pdf_path, ocr=ocr)
 
 
+def _ocr_pipeline(tasks: list, workers: int, on_result):
+    """Overlap page rasterization with OCR inference for the rescue phase.
+
+    One producer thread renders PDFs into a bounded queue while the
+    coordinator feeds each rendered page to a process pool of tesseract
+    workers, so at most 2×workers PDFs are held in memory.  PyMuPDF is not
+    thread-safe (and holds the GIL while rendering), so every fitz call stays
+    on that single producer thread; rendering a page is far cheaper than
+    OCR-ing it, so one renderer keeps the tesseract pool busy.
+    on_result(task, vins, cats, err) is called in this thread once per task,
+    in completion order."""
+    import queue
+    import concurrent.futures
+
+    raster_q = queue.Queue(maxsize=workers * 2)
+    stop = threading.Event()
+
+    def _produce():
+        for task in tasks:
+            if stop.is_set():
+                return
+            try:
+                item = _rasterize_pdf(task[0], _OCR_MAX_PAGES, _OCR_DPI)
+            except Exception as exc:
+                item = exc
+            raster_q.put((task, item))
+
+    pending = {}    # pdf_path -> [task, page_texts, pages_left]
+    in_flight = {}  # OCR future -> (pdf_path, page_idx)
+
+    def _finish(pdf_path):
+        task, texts, _ = pending.pop(pdf_path)
+        vins, cats = _classify_page_texts(texts)
+        on_result(task, vins, cats, None)
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_ocr_pool_init,
+            initargs=(_OCR_DPI, _OCR_MAX_PAGES, _OCR_TESS_CONFIG)) as ocr_pool:
+        producer = threading.Thread(target=_produce, name="ocr-raster", daemon=True)
+        producer.start()
+        try:
+            received = 0
+            while received < len(tasks) or in_flight:
+                if received < len(tasks) and len(in_flight) < workers * 2:
+                    task, item = raster_q.get()
+                    received += 1
+                    if isinstance(item, Exception):
+                        on_result(task, set(), set(), item)
+                        continue
+                    texts, images = item
+                    pending[task[0]] = [task, texts, len(images)]
+                    if not images:
+                        _finish(task[0])
+                    for idx, png in images:
+                        fut = ocr_pool.submit(_ocr_png, png, _OCR_TESS_CONFIG)
+                        in_flight[fut] = (task[0], idx)
+                    continue
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for fut in done:
+                    pdf_path, idx = in_flight.pop(fut)
+                    entry = pending[pdf_path]
+                    ocr_text = fut.result()
+                    if ocr_text:
+                        entry[1][idx] = entry[1][idx] + "\n" + ocr_text
+                    entry[2] -= 1
+                    if entry[2] == 0:
+                        _finish(pdf_path)
+        finally:
+            # Unblock the producer if it is stuck on a full queue
+            stop.set()
+            while producer.is_alive():
+                try:
+                    raster_q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+
 def _short_name_for_category(cat: str, fn: str) -> str:
     """Return the short filename for a detected category. Handles TALON/CIV."""
     if cat == "TALON / CIV":
@@ -2130,7 +2858,6 @@ def rescan_rescue_no_vin(output_root: Path, workers: int = 4, ocr: bool = False)
     pdf_results = {}
     # Per-folder aggregated VINs
     folder_vins = defaultdict(set)
-    PDF_TIMEOUT = 30
 
     # ── Pre-filter: separate cached / text-rich / needs-OCR ──────────
     cached_tasks = []   # already in OCR cache → instant
@@ -2204,23 +2931,15 @@ def rescan_rescue_no_vin(output_root: Path, workers: int = 4, ocr: bool = False)
                     bar.update(1)
 
     # ── Phase B: OCR scan for sparse-text PDFs ───────────────────────
+    # Rasterize on one thread, OCR in processes (see _ocr_pipeline)
     if ocr_tasks:
-        if workers > 1:
+        if workers > 1 and HAS_PYMUPDF:
+            def _on_ocr(t, vins, cats, err):
+                if err:
+                    tqdm.write(f"  WARNING: OCR failed: {t[0]}: {err}")
+                _collect(t[0], t[1], vins, cats, err, True)
             try:
-                with concurrent.futures.ProcessPoolExecutor(
-                        max_workers=workers,
-                        initializer=_ocr_pool_init,
-                        initargs=(_OCR_DPI, _OCR_MAX_PAGES, _OCR_TESS_CONFIG)) as pool:
-                    futs = {pool.submit(_scan_pdf_full, t[0], True): t
-                            for t in ocr_tasks}
-                    for f in concurrent.futures.as_completed(futs):
-                        t = futs[f]
-                        try:
-                            _, vins, cats, err = f.result(timeout=PDF_TIMEOUT)
-                            _collect(t[0], t[1], vins, cats, err, True)
-                        except Exception as exc:
-                            bar.update(1)
-                            tqdm.write(f"  WARNING: OCR failed: {t[0]}: {exc}")
+                _ocr_pipeline(ocr_tasks, workers, _on_ocr)
             except Exception:
                 for t in ocr_tasks:
                     if t[0] not in pdf_results:
@@ -2240,6 +2959,7 @@ def rescan_rescue_no_vin(output_root: Path, workers: int = 4, ocr: bool = False)
     bar.close()
 
     # Move files from _NO_VIN folders to VIN folders
+    jobs = []  # (folder_abs, part_abs, vins) in scan order
     processed_folders = set()
     for _, folder_abs, part_abs in scan_tasks:
         if folder_abs in processed_folders:
@@ -2252,9 +2972,12 @@ def rescan_rescue_no_vin(output_root: Path, workers: int = 4, ocr: bool = False)
             folder_name = Path(folder_abs).name
             vins = set(extract_all_vins(folder_name))
 
-        if not vins:
-            continue
+        if vins:
+            jobs.append((folder_abs, part_abs, vins))
 
+    def _rescue_folder(folder_abs, part_abs, vins) -> tuple:
+        """Move one _NO_VIN folder into its VIN folder(s): (moved, rescued)."""
+        moved = rescued = 0
         primary_vin = sorted(vins)[0]
         part_dir = Path(part_abs)
         target = part_dir / primary_vin
@@ -2277,7 +3000,7 @@ def rescan_rescue_no_vin(output_root: Path, workers: int = 4, ocr: bool = False)
                             break
 
                 _place_file_with_short_name(item, target, cat)
-                moved_files += 1
+                moved += 1
 
             # Cross-copy to other VINs
             for other_vin in sorted(vins - {primary_vin}):
@@ -2289,18 +3012,56 @@ def rescan_rescue_no_vin(output_root: Path, workers: int = 4, ocr: bool = False)
                     dst = other_target / item.name
                     if not dst.exists():
                         dst.parent.mkdir(parents=True, exist_ok=True)
-                        shutil.copy2(str(item), str(dst))
+                        _copy_file(_long(item), _long(dst))
 
             # Clean up empty _NO_VIN/folder
             try:
                 remaining = list(folder.rglob("*"))
                 if not any(r.is_file() for r in remaining):
                     shutil.rmtree(str(folder), ignore_errors=True)
-                    rescued_folders += 1
+                    rescued += 1
             except Exception:
                 pass
         except Exception as exc:
             tqdm.write(f"  WARNING: Failed to move {folder.name}: {exc}")
+        return moved, rescued
+
+    # Moves are metadata-only renames, so folders run on a thread pool.  Two
+    # folders touching a common VIN folder (as primary target or cross-copy)
+    # would race on _place_file_with_short_name's collision numbering: union
+    # them into one group that a single worker runs in scan order.
+    root_of = {}
+
+    def _find(key):
+        while root_of.setdefault(key, key) != key:
+            root_of[key] = root_of[root_of[key]]
+            key = root_of[key]
+        return key
+
+    for _, part_abs, vins in jobs:
+        keys = [(part_abs, v) for v in sorted(vins)]
+        for k in keys[1:]:
+            root_of[_find(k)] = _find(keys[0])
+    groups = defaultdict(list)
+    for job in jobs:
+        groups[_find((job[1], min(job[2])))].append(job)
+
+    def _rescue_group(group) -> tuple:
+        moved = rescued = 0
+        for job in group:
+            m, r = _rescue_folder(*job)
+            moved += m
+            rescued += r
+        return moved, rescued
+
+    if workers > 1 and len(groups) > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_rescue_group, groups.values()))
+    else:
+        results = [_rescue_group(g) for g in groups.values()]
+    for m, r in results:
+        moved_files += m
+        rescued_folders += r
 
     # Clean up empty _NO_VIN dirs
     for part_dir in sorted(output_root.iterdir()):
@@ -2395,16 +3156,7 @@ def _rescan_rename_group(files: list, base_name: str, vin: str,
         return
 
     # Hash for dedup
-    hashes = {}
-    for f in files:
-        try:
-            h = hashlib.md5()
-            with open(_long(f), 'rb') as fh:
-                for chunk in iter(lambda: fh.read(65536), b''):
-                    h.update(chunk)
-            hashes[f] = h.hexdigest()
-        except OSError:
-            hashes[f] = f"__err_{f}"
+    hashes = {f: _file_hash(f) for f in files}
 
     by_hash = defaultdict(list)
     for f in files:
@@ -2458,7 +3210,7 @@ def _rescan_rename_group(files: list, base_name: str, vin: str,
 
 def main():
     import argparse
-    global _OCR_ENABLED
+    global _OCR_ENABLED, _VERIFY_COPIES, _HARDLINK_DUPLICATES
 
     parser = argparse.ArgumentParser(
         description="Reorganize SIN vehicle folders by VIN (copy to output directory)")
@@ -2471,7 +3223,8 @@ def main():
     parser.add_argument("--no-pdf", action="store_true",
                         help="Skip PDF content scanning")
     parser.add_argument("--workers", type=int, default=None,
-                        help="Parallel threads (default: CPU count, capped at 8)")
+                        help="Parallel workers (default: CPU count capped at 8 for "
+                             "scanning/OCR, 4x CPU capped at 32 for copying)")
     parser.add_argument("--range-start", type=int, default=0,
                         help="Process from partition index, 1-based (0=beginning)")
     parser.add_argument("--range-end", type=int, default=0,
@@ -2495,10 +3248,22 @@ def main():
     parser.add_argument("--rescan", action="store_true",
                         help="Rescan existing output: rescue _NO_VIN folders via OCR, "
                              "re-apply renames, rebuild Excel. Use with --inventory-only.")
+    parser.add_argument("--verify", action="store_true",
+                        help="Hash existing output files before skipping them "
+                             "(default: same size and mtime counts as identical)")
+    parser.add_argument("--hardlink-duplicates", action="store_true",
+                        help="Hardlink repeat copies of one source where no reflink "
+                             "is possible, instead of copying the bytes again. Linked "
+                             "outputs share one inode: editing one edits all of them")
     args = parser.parse_args()
+    _VERIFY_COPIES = args.verify
+    _HARDLINK_DUPLICATES = args.hardlink_duplicates
+    _limit_native_threads()  # before any pool or tesseract is started
 
     root = Path(args.root)
     output_root = Path(args.output)
+    # OCR phases only append to the cache log; fold it in once on exit
+    atexit.register(compact_ocr_cache, output_root)
 
     # ── OCR standalone modes (operate on output folder only) ────────────────
     if (args.ocr or args.ocr_rescue) and not args.inventory_only and not args.execute:
@@ -2627,11 +3392,11 @@ def main():
             bulk_prescan_pdfs(root, workers, rs, re_)
 
         ledger = Ledger()
-        stats = scan_and_plan(root, output_root, ledger, scan_pdf, rs, re_)
+        stats = scan_and_plan(root, output_root, ledger, scan_pdf, rs, re_,
+                              workers=workers)
 
         if scan_pdf:
-            plan_pdf_cross_copies(ledger, output_root)
-            plan_contract_gap_fill(ledger, output_root)
+            plan_pdf_cross_copies_and_gap_fill(ledger, output_root)
 
         # Category renames → gives us original_names mapping
         original_names = {}
@@ -2714,6 +3479,8 @@ def main():
         print("OCR disabled.\n", file=sys.stderr)
 
     workers = args.workers or min(8, os.cpu_count() or 4)
+    # Copies are I/O-bound and want deeper queues than CPU-bound scanning/OCR
+    copy_workers = args.workers or min(32, (os.cpu_count() or 4) * 4)
     rs, re_ = args.range_start, args.range_end
 
     all_partitions = _get_partition_dirs(root)
@@ -2729,10 +3496,11 @@ def main():
           + (f"  (workers={workers})" if scan_pdf else ""), file=sys.stderr)
     if _OCR_ENABLED:
         print(f"  OCR:        ON (pytesseract, post-copy phases only, "
-              f"first {_OCR_MAX_PAGES} pages, 30s timeout)",
+              f"first {_OCR_MAX_PAGES} pages)",
               file=sys.stderr)
     print(f"  Execution:  {'threaded' if workers > 1 else 'sequential'}"
-          + (f"  (workers={workers})" if workers > 1 else ""), file=sys.stderr)
+          + (f"  (workers={workers}, copy={copy_workers})" if workers > 1 else ""),
+          file=sys.stderr)
     print(f"  Partitions: {len(selected)}/{len(all_partitions)}"
           + (f"  (range {rs or 1}–{re_ or len(all_partitions)})" if rs or re_ else " (all)"),
           file=sys.stderr)
@@ -2750,17 +3518,15 @@ def main():
 
     # Phase 2: Plan copies
     ledger = Ledger()
-    stats = scan_and_plan(root, output_root, ledger, scan_pdf, rs, re_)
+    stats = scan_and_plan(root, output_root, ledger, scan_pdf, rs, re_,
+                          workers=workers)
 
-    # Phase 2.5: PDF content cross-copy
+    # Phase 2.5 + 2.75: PDF content cross-copy, then contract/subcontract
+    # gap-fill sweep — one shared index of the planned PDF copies
     cross_stats = {}
-    if scan_pdf:
-        cross_stats = plan_pdf_cross_copies(ledger, output_root)
-
-    # Phase 2.75: Contract/subcontract gap-fill sweep
     gap_stats = {}
     if scan_pdf:
-        gap_stats = plan_contract_gap_fill(ledger, output_root)
+        cross_stats, gap_stats = plan_pdf_cross_copies_and_gap_fill(ledger, output_root)
 
     # Phase 3: Category-aware renaming + deduplication
     rename_stats = {}
@@ -2805,13 +3571,21 @@ def main():
     # Execute
     ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     jsonl_path = None
+    # The ledger only describes the whole output when this run covers every
+    # partition and nothing was in the output before it (see inventory below)
+    try:
+        with os.scandir(output_root) as it:
+            output_was_empty = next(it, None) is None
+    except FileNotFoundError:
+        output_was_empty = True
+    ledger_is_complete = not (rs or re_) and output_was_empty
     if args.execute and ledger.changes:
         os.makedirs(str(output_root), exist_ok=True)
         jsonl_path = output_root / f"log_{ts}.jsonl"
         print(f"\n  Streaming log: {jsonl_path}")
 
     if ledger.changes:
-        ledger.execute(dry_run=not args.execute, jsonl_path=jsonl_path, workers=workers)
+        ledger.execute(dry_run=not args.execute, jsonl_path=jsonl_path, workers=copy_workers)
 
     # Reports
     print(f"\n{'='*70}")
@@ -2822,9 +3596,9 @@ def main():
         json_path = output_root / f"log_{ts}.json"
         ledger.write_json(json_path)
 
-        done = sum(1 for c in ledger.changes if c.status == "done")
-        failed = sum(1 for c in ledger.changes if c.status == "failed")
-        skipped = sum(1 for c in ledger.changes if c.status == "skipped")
+        done = ledger.status_counts["done"]
+        failed = ledger.status_counts["failed"]
+        skipped = ledger.status_counts["skipped"]
         print(f"\nCopy complete: {done} done, {skipped} skipped (identical), {failed} failed")
 
         # Build and write inventory Excel
@@ -2833,17 +3607,21 @@ def main():
         # Primary: from ledger (has original names, guaranteed correct)
         inventory = build_inventory_from_ledger(
             ledger, output_root, original_names=original_names or None)
-        # Supplement: directory scan catches any extras
-        dir_inv = build_inventory(output_root, original_names=original_names or None)
-        for vin, data in dir_inv.items():
-            if vin not in inventory:
-                inventory[vin] = data
-            else:
-                for cat, files in data["_files"].items():
-                    existing = set(inventory[vin]["_files"].get(cat, []))
-                    for f in files:
-                        if f not in existing:
-                            inventory[vin]["_files"][cat].append(f)
+        # Supplement: directory scan catches any extras, including VINs from
+        # other ranges and earlier runs (the Excel is rewritten from scratch).
+        # Only a full run into an empty output, without PDF scans, renames or
+        # content reclassification, has nothing outside the ledger to find.
+        if (not ledger_is_complete or scan_pdf or args.rename_files
+                or not args.no_content_scan):
+            dir_inv = build_inventory(output_root, original_names=original_names or None)
+            for vin, data in dir_inv.items():
+                if vin not in inventory:
+                    inventory[vin] = data
+                else:
+                    for cat, files in data["_files"].items():
+                        inventory[vin]["_files"][cat] |= files
+        else:
+            print("  (skipping directory re-scan: ledger is authoritative)", file=sys.stderr)
 
         # Persist rename map for future --inventory-only runs
         if original_names: